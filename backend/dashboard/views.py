@@ -5,8 +5,9 @@ from django.views.generic import ListView, TemplateView
 from django.db.models import Count, Avg, Q, F, ExpressionWrapper, DurationField, FloatField
 from django.utils import timezone
 from datetime import timedelta
-from tickets.models import Ticket, TicketStatusHistory
+from tickets.models import Ticket, TicketStatusHistory, ArchivedTicket
 from users.models import User
+from ticketing_system.replicas import replica_reads
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
@@ -14,6 +15,7 @@ class AdminRequiredMixin(UserPassesTestMixin):
         return self.request.user.is_authenticated and self.request.user.is_admin
 
 
+@replica_reads
 class DashboardHomeView(LoginRequiredMixin, TemplateView):
     template_name = 'dashboard/dashboard.html'
 
@@ -39,13 +41,15 @@ class DashboardHomeView(LoginRequiredMixin, TemplateView):
         last_30_days = now - timedelta(days=30)
 
         # System overview
-        total_tickets = Ticket.objects.count()
+        # Archived tickets are all closed and still count towards the totals
+        archived_tickets = ArchivedTicket.objects.count()
+        total_tickets = Ticket.objects.count() + archived_tickets
         open_tickets = Ticket.objects.filter(status='open').count()
         in_progress_tickets = Ticket.objects.filter(status='in_progress').count()
-        closed_tickets = Ticket.objects.filter(status='closed').count()
+        closed_tickets = Ticket.objects.filter(status='closed').count() + archived_tickets
 
         # Recent tickets
-        recent_tickets = Ticket.objects.select_related('created_by', 'assigned_to').order_by('-created_at')[:10]
+        recent_tickets = Ticket.objects.select_related('created_by', 'assigned_to').with_overdue().order_by('-created_at')[:10]
 
         # Ticket counts by status
         status_counts = Ticket.objects.values('status').annotate(count=Count('id'))
@@ -79,7 +83,6 @@ class DashboardHomeView(LoginRequiredMixin, TemplateView):
     def get_automation_team_context(self):
         """Context for automation team dashboard"""
         user = self.request.user
-        now = timezone.now()
 
         # Assigned tickets
         assigned_tickets = Ticket.objects.filter(assigned_to=user)
@@ -88,16 +91,13 @@ class DashboardHomeView(LoginRequiredMixin, TemplateView):
         my_closed_tickets = assigned_tickets.filter(status='closed').count()
 
         # Recent assigned tickets
-        recent_assigned = assigned_tickets.select_related('created_by').order_by('-updated_at')[:10]
+        recent_assigned = assigned_tickets.select_related('created_by').with_overdue().order_by('-updated_at')[:10]
 
         # My tickets by status
         my_status_counts = assigned_tickets.values('status').annotate(count=Count('id'))
 
         # Overdue tickets assigned to me
-        overdue_tickets = assigned_tickets.filter(
-            due_date__lt=now,
-            status__in=['open', 'in_progress']
-        )
+        overdue_tickets = assigned_tickets.overdue()
 
         return {
             'dashboard_type': 'automation_team',
@@ -118,10 +118,11 @@ class DashboardHomeView(LoginRequiredMixin, TemplateView):
         user_tickets = Ticket.objects.filter(created_by=user)
         my_open_tickets = user_tickets.filter(status='open').count()
         my_in_progress_tickets = user_tickets.filter(status='in_progress').count()
-        my_closed_tickets = user_tickets.filter(status='closed').count()
+        my_closed_tickets = (user_tickets.filter(status='closed').count()
+                             + ArchivedTicket.objects.filter(created_by=user).count())
 
         # Recent tickets
-        recent_tickets = user_tickets.select_related('assigned_to').order_by('-created_at')[:10]
+        recent_tickets = user_tickets.select_related('assigned_to').with_overdue().order_by('-created_at')[:10]
 
         # My tickets by status
         my_status_counts = user_tickets.values('status').annotate(count=Count('id'))
@@ -170,6 +171,7 @@ class DashboardHomeView(LoginRequiredMixin, TemplateView):
         ).order_by('-closure_rate')
 
 
+@replica_reads
 class AnalyticsView(AdminRequiredMixin, TemplateView):
     template_name = 'dashboard/analytics.html'
 
@@ -260,6 +262,7 @@ class AnalyticsView(AdminRequiredMixin, TemplateView):
         ).order_by('priority')
 
 
+@replica_reads
 class UserManagementView(AdminRequiredMixin, ListView):
     model = User
     template_name = 'dashboard/user_management.html'
@@ -1,12 +1,17 @@
 from django.contrib import admin
+from ticketing_system.admin_performance import AutocompleteFilter, PerformanceModeAdmin
 from .models import Notification
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'notification_type', 'is_read', 'is_sent', 'created_at')
+class NotificationAdmin(PerformanceModeAdmin):
+    list_display = ('title', 'user', 'notification_type', 'event_count', 'is_read', 'is_sent', 'created_at', 'last_event_at')
     list_filter = ('notification_type', 'is_read', 'is_sent', 'created_at')
     search_fields = ('title', 'message', 'user__email')
+    performance_list_filter = ('notification_type', 'is_read', 'is_sent', 'created_at', ('user', AutocompleteFilter))
+    performance_autocomplete_fields = ('user', 'ticket')
+    search_text_field = 'title'
+    search_user_field = 'user'
     readonly_fields = ('id', 'created_at', 'sent_at')
     date_hierarchy = 'created_at'
 
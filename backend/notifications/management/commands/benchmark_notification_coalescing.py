@@ -0,0 +1,121 @@
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from notifications.models import Notification
+from notifications.tasks import send_email_notification
+from tickets.models import Ticket
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Count notification rows and immediate emails for a synthetic burst-of-comments '
+            'workload with and without coalescing (everything is rolled back afterwards)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=20)
+        parser.add_argument('--bursts', type=int, default=150, help='Conversations spread over --hours')
+        parser.add_argument('--max-burst', type=int, default=12, help='Most comments in one burst')
+        parser.add_argument('--gap', type=float, default=3.0, help='Minutes between comments in a burst')
+        parser.add_argument('--hours', type=float, default=24.0)
+        parser.add_argument('--read-every', type=float, default=120.0,
+                            help='Minutes between each user opening the bell and marking all read (0 = never)')
+        parser.add_argument('--window', type=int, default=3600,
+                            help='NOTIFICATION_COALESCE_SECONDS for the coalesced run')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        schedule = self.build_schedule(options)
+        comments = sum(len(burst) for _, _, burst in schedule)
+        self.stdout.write(f"{options['tickets']} tickets, {len(schedule)} bursts, {comments} comments "
+                          f"over {options['hours']:g}h, bell read every {options['read_every']:g} min")
+        self.stdout.write(f"{'mode':<22}{'rows':>8}{'rows/comment':>14}{'max events/row':>16}{'emails':>8}")
+
+        results = {}
+        for label, window in (('one row per event', 0), (f"coalesced ({options['window']}s)", options['window'])):
+            rows, per_comment, max_events, emails = self.run_workload(schedule, window, options)
+            results[window] = rows
+            self.stdout.write(f'{label:<22}{rows:>8}{per_comment:>14.2f}{max_events:>16}{emails:>8}')
+
+        if results[0]:
+            self.stdout.write(f"Coalescing saves {(1 - results[options['window']] / results[0]) * 100:.1f}% of rows")
+
+    def build_schedule(self, options):
+        """(start minute, ticket index, [author slots]) per burst; slot 0 creator, 1 assignee, 2 other staff"""
+        rng = random.Random(options['seed'])
+        schedule = []
+        for _ in range(options['bursts']):
+            start = rng.uniform(0, options['hours'] * 60)
+            authors = [rng.choice((0, 1, 1, 2)) for _ in range(rng.randint(1, options['max_burst']))]
+            schedule.append((start, rng.randrange(options['tickets']), authors))
+        return sorted(schedule)
+
+    def run_workload(self, schedule, window, options):
+        events = []
+        for start, ticket_index, authors in schedule:
+            for position, slot in enumerate(authors):
+                events.append((start + position * options['gap'], ticket_index, slot))
+        events.sort()
+
+        base = timezone.now()
+        clock = {'now': base}
+
+        # Emails for immediate delivery are sent in-process when each comment
+        # "commits", so rows marked sent take part just as in production
+        def send_now(args, **kwargs):
+            send_email_notification(*args)
+
+        with transaction.atomic(), override_settings(
+                    NOTIFICATION_COALESCE_SECONDS=window, ALLOWED_HOSTS=['*'],
+                    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'), \
+                mock.patch('django.utils.timezone.now', lambda: clock['now']), \
+                mock.patch.object(send_email_notification, 'apply_async', send_now):
+            mail.outbox = []
+            users, tickets = self.create_fixtures(options['tickets'])
+            clients = {}
+            for user in users:
+                clients[user.id] = Client()
+                clients[user.id].force_login(user)
+            before = Notification.objects.count()
+            last_read = 0.0
+
+            for minute, ticket_index, slot in events:
+                clock['now'] = base + timedelta(minutes=minute)
+                if options['read_every'] and minute - last_read >= options['read_every']:
+                    Notification.objects.filter(is_read=False).update(is_read=True)
+                    last_read = minute
+
+                ticket = tickets[ticket_index]
+                author = (ticket.created_by, ticket.assigned_to, users[2])[slot]
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    clients[author.id].post(f'/tickets/{ticket.id}/comment/', {
+                        'content': f'Update at minute {minute:.0f}',
+                        'comment_type': 'public',
+                    })
+
+            rows = Notification.objects.count() - before
+            max_events = max(Notification.objects.values_list('event_count', flat=True), default=0)
+            emails = len(mail.outbox)
+            transaction.set_rollback(True)
+
+        return rows, rows / len(events), max_events, emails
+
+    def create_fixtures(self, ticket_count):
+        suffix = random.randrange(10 ** 8)
+        users = [
+            User.objects.create_user(email=f'{name}-{suffix}@benchmark.invalid', username=f'{name}-{suffix}',
+                                     password=None, role=role)
+            for name, role in (('requester', 'user'), ('engineer', 'automation_team'), ('reviewer', 'automation_team'))
+        ]
+        tickets = [
+            Ticket.objects.create(title=f'Benchmark ticket {index}', description='Synthetic workload',
+                                  category=Ticket.CATEGORY_CHOICES[0][0], created_by=users[0], assigned_to=users[1])
+            for index in range(ticket_count)
+        ]
+        return users, tickets
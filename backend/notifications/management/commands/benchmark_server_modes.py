@@ -0,0 +1,144 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+
+SERVERS = {
+    'wsgi': ['ticketing_system.wsgi:application'],
+    'asgi': ['--worker-class=uvicorn.workers.UvicornWorker', 'ticketing_system.asgi:application'],
+}
+
+
+class Command(BaseCommand):
+    help = ('Start gunicorn in WSGI and ASGI mode and compare how each copes with '
+            'increasing numbers of concurrent connections to a polled endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Email of an existing user to make requests as')
+        parser.add_argument('--path', default='/notifications/unread/')
+        parser.add_argument('--modes', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument('--concurrency', nargs='+', type=int, default=[10, 50, 200])
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--timeout', type=float, default=10.0,
+                            help='Requests slower than this count as errors')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        session = self.create_session(user)
+        cookies = {settings.SESSION_COOKIE_NAME: session.session_key}
+        url = f"http://127.0.0.1:{options['port']}{options['path']}"
+
+        self.stdout.write(f"{url} with {options['workers']} workers, "
+                          f"{options['duration']:g}s per level, timeout {options['timeout']:g}s")
+        self.stdout.write(f"{'mode':<6}{'conns':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+                          f"{'p99 ms':>10}{'errors':>8}")
+        try:
+            for mode in options['modes']:
+                server = self.start_server(mode, options)
+                try:
+                    self.wait_until_ready(url, cookies, server)
+                    for concurrency in options['concurrency']:
+                        result = asyncio.run(run_load(url, cookies, concurrency, options['duration'],
+                                                      options['timeout']))
+                        self.stdout.write(
+                            f"{mode:<6}{concurrency:>7}{result['throughput']:>10.1f}"
+                            f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}"
+                            f"{result['errors']:>8}"
+                        )
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            session.delete()
+
+    def create_session(self, user):
+        """Log the user in on a new session, as the login view would"""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    def start_server(self, mode, options):
+        env = dict(os.environ, SERVER_MODE=mode)
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            f"--bind=127.0.0.1:{options['port']}",
+            f"--workers={options['workers']}",
+            '--log-level=warning',
+            *SERVERS[mode],
+        ]
+        return subprocess.Popen(command, env=env, cwd=settings.BASE_DIR)
+
+    def wait_until_ready(self, url, cookies, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited during startup')
+            try:
+                response = httpx.get(url, cookies=cookies, timeout=1)
+            except httpx.TransportError:
+                time.sleep(0.2)
+                continue
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}; check ALLOWED_HOSTS and --user')
+            return
+        raise CommandError(f'gunicorn did not answer within {timeout}s')
+
+
+async def run_load(url, cookies, concurrency, duration, timeout):
+    """Keep ``concurrency`` connections busy for ``duration`` seconds"""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(cookies=cookies, limits=limits, timeout=timeout) as client:
+        deadline = time.monotonic() + duration
+
+        async def connection():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    response = await client.get(url)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append((time.monotonic() - started) * 1000)
+
+        started = time.monotonic()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'errors': errors,
+    }
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:39
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    Notification.objects.update(last_event_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="event_count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="event_type",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="last_event_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-last_event_at"], name="notificatio_user_id_d1f289_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "ticket", "event_type"],
+                name="notificatio_user_id_487df6_idx",
+            ),
+        ),
+    ]
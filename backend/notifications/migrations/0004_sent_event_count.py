@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:36
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_event_count(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    Notification.objects.filter(is_sent=True).update(sent_event_count=F("event_count"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0003_trigram_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="sent_event_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_event_count, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import uuid
+from datetime import timedelta
 from django.db import models
+from django.db.models import Case, F, When
 from django.conf import settings
 from django.utils import timezone
 
@@ -13,6 +15,13 @@ class Notification(models.Model):
         ('both', 'Both'),
     ]
 
+    # Events that fold into one unread notification per ticket: (singular, plural)
+    COALESCED_EVENTS = {
+        'comment': ('new comment', 'new comments'),
+        'internal_note': ('new internal note', 'new internal notes'),
+        'status': ('status update', 'status updates'),
+    }
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     ticket = models.ForeignKey('tickets.Ticket', on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
@@ -20,12 +29,16 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     notification_type = models.CharField(max_length=10, choices=NOTIFICATION_TYPE_CHOICES, default='both')
+    event_type = models.CharField(max_length=20, blank=True)
+    event_count = models.PositiveIntegerField(default=1)
 
     is_read = models.BooleanField(default=False)
-    is_sent = models.BooleanField(default=False)
+    is_sent = models.BooleanField(default=False)  # Every event so far has been emailed
+    sent_event_count = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     sent_at = models.DateTimeField(null=True, blank=True)
+    last_event_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'notifications'
@@ -34,21 +47,38 @@ class Notification(models.Model):
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['is_sent']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-last_event_at']),
+            models.Index(fields=['user', 'ticket', 'event_type']),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.user.email}"
 
+    @property
+    def display_title(self):
+        """Title for the bell, e.g. "5 new comments on <ticket>" once events are coalesced"""
+        if self.event_count > 1 and self.event_type in self.COALESCED_EVENTS and self.ticket_id:
+            return f"{self.event_count} {self.COALESCED_EVENTS[self.event_type][1]} on {self.ticket.title}"
+        return self.title
+
     def mark_as_read(self):
         """Mark notification as read"""
         self.is_read = True
         self.save(update_fields=['is_read'])
 
     def mark_as_sent(self):
-        """Mark notification as sent"""
-        self.is_sent = True
+        """Mark the events up to the loaded event_count as sent
+
+        Events folded in since the row was loaded keep it unsent.
+        """
         self.sent_at = timezone.now()
-        self.save(update_fields=['is_sent', 'sent_at'])
+        self.sent_event_count = self.event_count
+        Notification.objects.filter(id=self.id).update(
+            is_sent=Case(When(event_count=self.event_count, then=True), default=False),
+            sent_event_count=self.event_count,
+            sent_at=self.sent_at,
+        )
+        self.is_sent = True
 
     @classmethod
     def create_notification(cls, user, title, message, notification_type='both', ticket=None):
@@ -61,6 +91,49 @@ class Notification(models.Model):
             ticket=ticket
         )
 
+    @classmethod
+    def record_event(cls, user_id, ticket, event_type, title, message, notification_type='both'):
+        """Create a notification for a ticket event, or fold it into the user's unread one
+
+        Events of the same type on the same ticket within NOTIFICATION_COALESCE_SECONDS
+        of the previous one update a single unread row (event count, latest message
+        and time) instead of adding another. Rows already read are left alone.
+
+        Returns the notification when an email should be queued for the event: a
+        new row, or one whose earlier events were already emailed (immediate
+        delivery sends each row as soon as it is created). Returns None when the
+        event was folded into a row whose pending email will now cover it.
+        """
+        now = timezone.now()
+        window = settings.NOTIFICATION_COALESCE_SECONDS
+        if window:
+            latest = cls.objects.filter(
+                user_id=user_id,
+                ticket=ticket,
+                event_type=event_type,
+                is_read=False,
+                last_event_at__gte=now - timedelta(seconds=window)
+            ).order_by('-last_event_at').values('id', 'is_sent').first()
+            if latest is not None:
+                updated = cls.objects.filter(id=latest['id'], is_read=False).update(
+                    event_count=F('event_count') + 1,
+                    message=message,
+                    last_event_at=now,
+                    is_sent=False
+                )
+                if updated:
+                    return cls.objects.get(id=latest['id']) if latest['is_sent'] else None
+
+        return cls.objects.create(
+            user_id=user_id,
+            ticket=ticket,
+            event_type=event_type,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            last_event_at=now
+        )
+
     def get_unread_count_for_user(user):
         """Get unread notification count for a user"""
         return cls.objects.filter(user=user, is_read=False).count()
\ No newline at end of file
@@ -1,15 +1,22 @@
+from itertools import groupby
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
 from .models import Notification
 
-
 @shared_task
 def send_email_notification(notification_id):
     """Send email notification asynchronously"""
     try:
         notification = Notification.objects.get(id=notification_id)
+        if notification.is_sent:
+            # An earlier task already emailed every event folded into the row
+            return f"Notification {notification_id} already sent"
 
         # Prepare email context
         context = {
@@ -45,22 +52,59 @@ def send_email_notification(notification_id):
         return f"Failed to send email: {str(e)}"
 
 
+def queue_email(notification_id, priority=None, delivery='immediate'):
+    """Queue a notification email on the queue for the ticket's priority"""
+    if delivery != 'immediate':
+        return  # Left unsent for send_email_digests
+    queue = settings.PRIORITY_EMAIL_QUEUES.get(priority)
+    send_email_notification.apply_async((str(notification_id),), queue=queue)
+
+
+def queue_emails(notifications, priority=None):
+    """Queue the emails of new notifications once the transaction commits
+
+    Falsy entries (events folded into an existing notification by
+    ``Notification.record_event``) and on-screen only notifications are skipped;
+    each recipient's delivery setting decides between now and their digest.
+    Settings come from the staff directory or a recipient already loaded on
+    the notification, so only other users cost a query.
+    """
+    from users.directory import get_staff
+    from users.models import User
+
+    notifications = [
+        notification for notification in notifications
+        if notification and notification.notification_type in ('email', 'both')
+    ]
+    if not notifications:
+        return
+    deliveries = {member.id: member.email_delivery for member in get_staff()}
+    for notification in notifications:
+        if notification.user_id not in deliveries and Notification.user.is_cached(notification):
+            deliveries[notification.user_id] = notification.user.email_delivery
+    missing = {notification.user_id for notification in notifications} - deliveries.keys()
+    if missing:
+        deliveries.update(User.objects.filter(id__in=missing).values_list('id', 'email_delivery'))
+    transaction.on_commit(lambda: [
+        queue_email(notification.id, priority, deliveries.get(notification.user_id))
+        for notification in notifications
+    ])
+
+
 @shared_task
 def send_ticket_created_notification(ticket_id):
     """Send notifications when a new ticket is created"""
     from tickets.models import Ticket
-    from users.models import User
+    from users.directory import get_staff
 
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = Ticket.objects.select_related('created_by').get(id=ticket_id)
 
         # Get all admin and automation team users
-        notify_users = User.objects.filter(role__in=['admin', 'automation_team'])
-
-        for user in notify_users:
-            if user != ticket.created_by:  # Don't notify the creator
-                notification = Notification.create_notification(
-                    user=user,
+        for member in get_staff():
+            if member.id != ticket.created_by_id:  # Don't notify the creator
+                notification = Notification.objects.create(
+                    user_id=member.id,
                     title=f'New Ticket: {ticket.title}',
                     message=f'A new ticket has been created by {ticket.created_by.get_full_name() or ticket.created_by.email}',
                     notification_type='both',
@@ -68,7 +112,7 @@ def send_ticket_created_notification(ticket_id):
                 )
 
                 # Queue email sending
-                send_email_notification.delay(str(notification.id))
+                queue_email(notification.id, ticket.priority, member.email_delivery)
 
         return f"Notifications sent for ticket {ticket.title}"
 
@@ -98,7 +142,7 @@ def send_status_update_notification(ticket_id, old_status, new_status, changed_b
                 ticket=ticket
             )
 
-            send_email_notification.delay(str(notification.id))
+            queue_email(notification.id, ticket.priority, ticket.created_by.email_delivery)
 
         return f"Status update notifications sent for ticket {ticket.title}"
 
@@ -108,6 +152,86 @@ def send_status_update_notification(ticket_id, old_status, new_status, changed_b
         return f"Failed to send status update notification: {str(e)}"
 
 
+@shared_task
+def send_email_digests(period):
+    """Send each hourly or daily digest user one email covering their unsent notifications"""
+    now = timezone.now()
+    html_template = get_template('emails/digest_email.html')
+    text_template = get_template('emails/digest_email.txt')
+
+    # is_sent=False is what is pending, however late its transaction committed
+    pending = Notification.objects.filter(
+        user__email_delivery=period,
+        user__is_active=True,
+        notification_type__in=['email', 'both'],
+        is_sent=False,
+        last_event_at__lte=now
+    )
+
+    # One SMTP connection for the whole run. Each batch of users is claimed
+    # in a short transaction, by marking its rows sent, and emailed after the
+    # commit, so no row lock is held while talking to the mail server
+    connection = get_connection(fail_silently=False)
+    digests = sent = 0
+    while True:
+        with transaction.atomic():
+            user_ids = list(
+                pending.order_by('user_id').values_list('user_id', flat=True).distinct()
+                [:settings.EMAIL_DIGEST_BATCH_SIZE]
+            )
+            # Rows locked by a concurrent run are left to it, so each
+            # notification goes out in exactly one digest
+            claimed = list(
+                pending.filter(user_id__in=user_ids)
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('user', 'ticket')
+                .order_by('user_id', 'last_event_at')
+            )
+            if not claimed:
+                break
+            claimed_ids = [notification.id for notification in claimed]
+            Notification.objects.filter(id__in=claimed_ids).update(
+                is_sent=True, sent_at=timezone.now(), sent_event_count=F('event_count')
+            )
+
+        messages = [
+            render_digest(user, period, list(group), html_template, text_template)
+            for user, group in groupby(claimed, key=lambda notification: notification.user)
+        ]
+        try:
+            connection.send_messages(messages)
+        except Exception:
+            # Release the batch for the next run
+            Notification.objects.filter(id__in=claimed_ids).update(is_sent=False, sent_at=None)
+            raise
+        digests += len(messages)
+        sent += len(claimed)
+
+    return f"Sent {digests} {period} digests covering {sent} notifications"
+
+
+def render_digest(user, period, notifications, html_template, text_template):
+    """Build the digest email for one user from every notification in a single render"""
+    count = len(notifications)
+    subject = f"[Ticketing System] {count} new notification{'s' if count != 1 else ''}"
+    context = {
+        'subject': subject,
+        'count': count,
+        'user': user,
+        'period': period,
+        'notifications': notifications[-settings.EMAIL_DIGEST_MAX_ITEMS:],
+        'hidden_count': max(count - settings.EMAIL_DIGEST_MAX_ITEMS, 0),
+    }
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=text_template.render(context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    message.attach_alternative(html_template.render(context), 'text/html')
+    return message
+
+
 @shared_task
 def cleanup_old_notifications():
     """Clean up old notifications (older than 90 days)"""
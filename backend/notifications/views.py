@@ -1,33 +1,45 @@
-from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from users.decorators import async_under_asgi
+from ticketing_system.replicas import replica_reads
 from .models import Notification
 
+# These endpoints are polled by every open page. Under ASGI (SERVER_MODE=asgi)
+# they are served as async views, so waiting on the database does not hold a
+# worker; under WSGI they stay sync (see users.decorators).
 
+
+def _recent_notifications(user):
+    # Coalesced notifications move to the top when another event is folded in
+    return Notification.objects.filter(user=user).select_related('ticket').order_by('-last_event_at')[:20]
+
+
+def _notification_data(notification):
+    return {
+        'id': str(notification.id),
+        'title': notification.display_title,
+        'message': notification.message,
+        'created_at': notification.created_at.isoformat(),
+        'last_event_at': notification.last_event_at.isoformat(),
+        'event_count': notification.event_count,
+        'is_read': notification.is_read,
+        'ticket_id': str(notification.ticket_id) if notification.ticket_id else None,
+    }
+
+
+@replica_reads
+@async_under_asgi
 @login_required
 @require_http_methods(["GET"])
 def notification_list(request):
     """Get list of notifications for the current user"""
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).select_related('ticket').order_by('-created_at')[:20]
-
-    data = []
-    for notification in notifications:
-        notif_data = {
-            'id': str(notification.id),
-            'title': notification.title,
-            'message': notification.message,
-            'created_at': notification.created_at.isoformat(),
-            'is_read': notification.is_read,
-            'ticket_id': str(notification.ticket.id) if notification.ticket else None,
-        }
-        data.append(notif_data)
-
+    data = [_notification_data(notification) for notification in _recent_notifications(request.user)]
     return JsonResponse({'notifications': data})
 
 
+@replica_reads
+@async_under_asgi
 @login_required
 @require_http_methods(["GET"])
 def unread_count(request):
@@ -36,21 +48,21 @@ def unread_count(request):
     return JsonResponse({'count': count})
 
 
+@async_under_asgi
 @login_required
 @require_http_methods(["POST"])
 def mark_as_read(request, notification_id):
     """Mark a notification as read"""
-    try:
-        notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.mark_as_read()
-        return JsonResponse({'success': True})
-    except Notification.DoesNotExist:
+    updated = Notification.objects.filter(id=notification_id, user=request.user).update(is_read=True)
+    if not updated:
         return JsonResponse({'success': False, 'error': 'Notification not found'})
+    return JsonResponse({'success': True})
 
 
+@async_under_asgi
 @login_required
 @require_http_methods(["POST"])
 def mark_all_as_read(request):
     """Mark all notifications as read for the current user"""
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-    return JsonResponse({'success': True})
\ No newline at end of file
+    return JsonResponse({'success': True})
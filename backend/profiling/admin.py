@@ -0,0 +1,130 @@
+import io
+import marshal
+
+from django.contrib import admin
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import ProfiledQuery, QueryStat, RequestProfile
+
+
+class _SavedStats:
+    """Stand-in profiler so pstats (and gprof2dot) can load stored stats"""
+
+    def __init__(self, data):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+class ProfiledQueryInline(admin.TabularInline):
+    model = ProfiledQuery
+    fields = ('position', 'database', 'duration_ms', 'sql', 'params', 'explain')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count',
+                    'query_time_ms', 'user')
+    list_filter = ('method', 'status_code')
+    search_fields = ('path', 'view_name')
+    fields = ('created_at', 'user', 'method', 'path', 'view_name', 'status_code', 'duration_ms',
+              'query_count', 'query_time_ms', 'downloads', 'summary')
+    readonly_fields = fields
+    inlines = [ProfiledQueryInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').defer('profile_data', 'profile_summary')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<uuid:profile_id>/stats/', self.admin_site.admin_view(self.download_stats),
+                 name='profiling_requestprofile_stats'),
+            path('<uuid:profile_id>/callgraph/', self.admin_site.admin_view(self.download_callgraph),
+                 name='profiling_requestprofile_callgraph'),
+        ] + super().get_urls()
+
+    @admin.display(description='Profile')
+    def downloads(self, obj):
+        if not obj.profile_data:
+            return 'No cProfile stats were captured'
+        return format_html(
+            '<a href="{}">Stats (.prof, for snakeviz or pstats)</a> &middot; '
+            '<a href="{}">Call graph (.dot, render with Graphviz)</a>',
+            reverse('admin:profiling_requestprofile_stats', args=[obj.id]),
+            reverse('admin:profiling_requestprofile_callgraph', args=[obj.id]),
+        )
+
+    @admin.display(description='Slowest functions (cumulative)')
+    def summary(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.profile_summary)
+
+    def _get_stats(self, request, profile_id):
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, id=profile_id)
+        if not profile.profile_data:
+            raise Http404
+        return profile, bytes(profile.profile_data)
+
+    def download_stats(self, request, profile_id):
+        profile, data = self._get_stats(request, profile_id)
+        response = HttpResponse(data, content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.prof"'
+        return response
+
+    def download_callgraph(self, request, profile_id):
+        import gprof2dot
+
+        profile, data = self._get_stats(request, profile_id)
+        parser = gprof2dot.PstatsParser(_SavedStats(data))
+        graph = parser.parse()
+        # Same defaults as the gprof2dot command line: drop nodes under 0.5%, edges under 0.1%
+        graph.prune(0.005, 0.001, [], False)
+        output = io.StringIO()
+        gprof2dot.DotWriter(output).graph(graph, gprof2dot.themes['color'])
+
+        response = HttpResponse(output.getvalue(), content_type='text/vnd.graphviz')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.dot"'
+        return response
+
+
+@admin.register(QueryStat)
+class QueryStatAdmin(admin.ModelAdmin):
+    """Hourly SQL fingerprint totals; the heaviest statements sort first"""
+    list_display = ('period', 'view_name', 'short_sql', 'calls', 'total_ms', 'mean', 'max_ms', 'sample_ms')
+    list_filter = ('period',)
+    search_fields = ('view_name', 'sql', 'fingerprint')
+    ordering = ('-period', '-total_ms')
+    fields = ('period', 'view_name', 'fingerprint', 'sql', 'calls', 'total_ms', 'mean', 'max_ms',
+              'last_seen', 'sample_ms', 'sample_params', 'sample_plan')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else f'{obj.sql[:120]}...'
+
+    @admin.display(description='Mean ms')
+    def mean(self, obj):
+        return f'{obj.mean_ms:.2f}'
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProfilingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'profiling'
+
+    def ready(self):
+        # Install the SQL recorders on connections opened from now on
+        from . import middleware, query_stats  # noqa: F401
@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from importlib import import_module
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import resolve_url
+from django.utils.crypto import get_random_string
+from tickets.models import Ticket
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Replay a mix of browser sessions (notification polling, dashboard reloads, ticket '
+            'creates and comments) against a running server and report latency per endpoint. '
+            'Writers create real tickets and comments; --cleanup deletes the tickets afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=300.0, help='Seconds to run after starting')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Active users to spread sessions over; tabs of one user share its session')
+        parser.add_argument('--pollers', type=int, default=1000, help='Open tabs polling the notification bell')
+        parser.add_argument('--poll-interval', type=float, default=30.0)
+        parser.add_argument('--dashboards', type=int, default=50, help='Tabs reloading the dashboard')
+        parser.add_argument('--dashboard-interval', type=float, default=300.0)
+        parser.add_argument('--writers', type=int, default=5, help='Staff sessions creating tickets and comments')
+        parser.add_argument('--write-interval', type=float, default=10.0, help='Seconds between writes per writer')
+        parser.add_argument('--comment-ratio', type=float, default=0.8, help='Share of writes that are comments')
+        parser.add_argument('--max-connections', type=int, default=200)
+        parser.add_argument('--timeout', type=float, default=10.0, help='Requests slower than this count as errors')
+        parser.add_argument('--title-prefix', default='[load test]', help='Prefix of the tickets writers create')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the created tickets afterwards')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(is_active=True).order_by('date_joined')[:options['users']])
+        staff = [user for user in users if user.is_admin or user.is_automation_team]
+        if not users:
+            raise CommandError('No active users to open sessions for')
+        if options['writers'] and not staff:
+            raise CommandError(f"None of the first {options['users']} users is staff; writers need one")
+        tickets = [str(pk) for pk in Ticket.objects.order_by('-created_at').values_list('id', flat=True)[:500]]
+
+        sessions = {user.id: self.create_session(user) for user in users}
+        self.stdout.write(
+            f"{options['base_url']}: {options['pollers']} pollers every {options['poll_interval']:g}s, "
+            f"{options['dashboards']} dashboards every {options['dashboard_interval']:g}s, "
+            f"{options['writers']} writers every {options['write_interval']:g}s "
+            f"over {len(users)} users for {options['duration']:g}s"
+        )
+        try:
+            results, elapsed = asyncio.run(LoadTest(options, users, staff, sessions, tickets).run())
+        finally:
+            for session in sessions.values():
+                session.delete()
+            if options['cleanup']:
+                deleted = Ticket.objects.filter(title__startswith=options['title_prefix']).delete()[0]
+                self.stdout.write(f'Deleted {deleted} rows created by the load test')
+
+        self.report(results, elapsed)
+
+    def create_session(self, user):
+        """Log the user in on a new session, as the login view would"""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    def report(self, results, elapsed):
+        self.stdout.write(f"{'endpoint':<22}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+                          f"{'p99 ms':>9}{'max ms':>9}{'errors':>8}{'error %':>9}")
+        for endpoint in sorted(results):
+            latencies = sorted(results[endpoint]['latencies'])
+            errors = results[endpoint]['errors']
+            total = len(latencies) + errors
+
+            def percentile(fraction):
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+            self.stdout.write(
+                f"{endpoint:<22}{total:>10}{total / elapsed:>9.1f}{percentile(0.50):>9.1f}"
+                f"{percentile(0.95):>9.1f}{percentile(0.99):>9.1f}{percentile(1.0):>9.1f}"
+                f"{errors:>8}{(errors / total * 100 if total else 0):>8.1f}%"
+            )
+        for endpoint, result in sorted(results.items()):
+            for reason, count in sorted(result['reasons'].items()):
+                self.stdout.write(f'  {endpoint}: {count} x {reason}')
+
+
+class LoadTest:
+    """One asyncio task per simulated tab, each on its own fixed schedule"""
+
+    def __init__(self, options, users, staff, sessions, tickets):
+        self.options = options
+        self.users = users
+        self.staff = staff
+        self.sessions = sessions
+        self.tickets = tickets
+        self.rng = random.Random(options['seed'])
+        self.results = defaultdict(lambda: {'latencies': [], 'errors': 0, 'reasons': defaultdict(int)})
+        self.deadline = None
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.options['max_connections'],
+                              max_keepalive_connections=self.options['max_connections'])
+        # Each request carries its own session cookie, so the client keeps none
+        async with httpx.AsyncClient(base_url=self.options['base_url'], limits=limits,
+                                     timeout=self.options['timeout'], follow_redirects=False) as client:
+            self.client = client
+            started = time.monotonic()
+            self.deadline = started + self.options['duration']
+            tabs = []
+            for _ in range(self.options['pollers']):
+                tabs.append(self.tab(self.rng.choice(self.users), self.options['poll_interval'], self.poll))
+            for _ in range(self.options['dashboards']):
+                tabs.append(self.tab(self.rng.choice(self.users), self.options['dashboard_interval'], self.dashboard))
+            for _ in range(self.options['writers']):
+                tabs.append(self.tab(self.rng.choice(self.staff), self.options['write_interval'], self.write))
+            await asyncio.gather(*tabs)
+        return self.results, time.monotonic() - started
+
+    async def tab(self, user, interval, action):
+        # Tabs were opened at random times, so their schedules are spread over one interval
+        csrf_token = get_random_string(32)
+        cookies = {settings.SESSION_COOKIE_NAME: self.sessions[user.id].session_key,
+                   settings.CSRF_COOKIE_NAME: csrf_token}
+        next_run = time.monotonic() + self.rng.uniform(0, interval)
+        while next_run < self.deadline:
+            await asyncio.sleep(max(0.0, next_run - time.monotonic()))
+            await action(cookies, csrf_token)
+            next_run += interval
+
+    async def request(self, endpoint, method, url, cookies, expected, **kwargs):
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, cookies=cookies, **kwargs)
+        except httpx.HTTPError as e:
+            self.results[endpoint]['errors'] += 1
+            self.results[endpoint]['reasons'][type(e).__name__] += 1
+            return
+        if response.status_code != expected:
+            self.results[endpoint]['errors'] += 1
+            self.results[endpoint]['reasons'][f'HTTP {response.status_code}'] += 1
+            return
+        if response.headers.get('location', '').startswith(resolve_url(settings.LOGIN_URL)):
+            # An expired or unknown session is redirected to the login page
+            self.results[endpoint]['errors'] += 1
+            self.results[endpoint]['reasons']['redirected to login'] += 1
+            return
+        self.results[endpoint]['latencies'].append((time.monotonic() - started) * 1000)
+
+    async def poll(self, cookies, csrf_token):
+        await self.request('notifications:unread', 'GET', '/notifications/unread/', cookies, 200)
+
+    async def dashboard(self, cookies, csrf_token):
+        await self.request('dashboard', 'GET', '/', cookies, 200)
+
+    async def write(self, cookies, csrf_token):
+        if self.tickets and self.rng.random() < self.options['comment_ratio']:
+            await self.request(
+                'tickets:add_comment', 'POST', f'/tickets/{self.rng.choice(self.tickets)}/comment/', cookies, 302,
+                data={'csrfmiddlewaretoken': csrf_token, 'content': 'Load test comment', 'comment_type': 'public'},
+            )
+        else:
+            await self.request(
+                'tickets:create', 'POST', '/tickets/create/', cookies, 302,
+                data={
+                    'csrfmiddlewaretoken': csrf_token,
+                    'title': f"{self.options['title_prefix']} {get_random_string(8)}",
+                    'description': 'Created by the load test',
+                    'category': Ticket.CATEGORY_CHOICES[0][0],
+                    'priority': 'medium',
+                },
+            )
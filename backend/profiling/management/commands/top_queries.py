@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from profiling.models import QueryStat
+
+
+class Command(BaseCommand):
+    help = 'List the SQL fingerprints that took the most database time, per view or task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--by', choices=['total', 'calls', 'max'], default='total')
+        parser.add_argument('--view', help='Only this URL name or task:<name>')
+
+    def handle(self, *args, **options):
+        stats = QueryStat.objects.filter(period__gte=timezone.now() - timedelta(hours=options['hours']))
+        if options['view']:
+            stats = stats.filter(view_name=options['view'])
+
+        rows = (
+            stats.values('fingerprint', 'view_name')
+            .annotate(total=Sum('total_ms'), count=Sum('calls'), slowest=Max('max_ms'), sql=Max('sql'))
+            .order_by({'total': '-total', 'calls': '-count', 'max': '-slowest'}[options['by']])
+            [:options['limit']]
+        )
+
+        self.stdout.write(f"{'total ms':>12}{'calls':>10}{'mean ms':>10}{'max ms':>10}  view / sql")
+        for row in rows:
+            mean = row['total'] / row['count'] if row['count'] else 0
+            self.stdout.write(f"{row['total']:>12.1f}{row['count']:>10}{mean:>10.2f}{row['slowest']:>10.1f}"
+                              f"  {row['view_name']}")
+            self.stdout.write(f"{'':>44}{row['sql'][:160]}")
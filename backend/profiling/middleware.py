@@ -0,0 +1,217 @@
+"""
+On-demand request profiler for admins.
+
+An admin adds an ``X-Profile: 1`` header (or ``?_profile=1``) to a request,
+and REQUEST_PROFILER_SAMPLE_RATE of those requests run under cProfile with
+every SQL statement and its timing recorded. The slowest SELECTs (up to
+REQUEST_PROFILER_EXPLAIN_COUNT) are then EXPLAINed, without ANALYZE so
+nothing runs twice, and the whole capture is stored as a ``RequestProfile``.
+The admin lists them under Profiling, with downloads of the raw stats and
+of a gprof2dot call graph.
+
+Requests without the flag only pay for the header and query string check.
+The SQL recorder installed on each connection goes straight to the database
+unless a profile is active in the current context.
+
+cProfile only sees the thread it was enabled in. Under ASGI a sync view runs
+in the request's thread-sensitive executor thread, so for those the profiler
+is enabled and disabled there; for async views it runs on the event loop
+thread, and their stats also include whatever else the loop ran meanwhile.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+SUMMARY_LINES = 60
+
+_capture = ContextVar('request_profile', default=None)
+
+
+class Capture:
+    """What is recorded while a profiled request runs"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = []  # (alias, sql, params, seconds)
+        self.profiling = False
+        self.started = None
+        self.duration = None
+
+    def start(self):
+        try:
+            self.profiler.enable()
+            self.profiling = True
+        except ValueError:
+            # Another profiler is active in this process; keep the SQL capture
+            pass
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        if self.profiling:
+            self.profiler.disable()
+
+
+def record_query(execute, sql, params, many, context):
+    capture = _capture.get()
+    if capture is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        capture.queries.append((context['connection'].alias, sql, None if many else params,
+                                time.perf_counter() - started))
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if settings.REQUEST_PROFILER_ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _flagged(request):
+    return request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+
+
+def _allowed(request):
+    """Admins only, sampled; loads the user, so async callers go through sync_to_async"""
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated and user.is_admin):
+        return False
+    return random.random() < settings.REQUEST_PROFILER_SAMPLE_RATE
+
+
+def _view_is_async(request):
+    try:
+        return iscoroutinefunction(resolve(request.path_info).func)
+    except Resolver404:
+        return False
+
+
+def explain(alias, sql, params):
+    """Plan of a statement as text; EXPLAIN only, the statement itself is not run"""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError as e:
+        return f'EXPLAIN failed: {e}'
+
+
+def save_profile(request, response, capture):
+    from .models import ProfiledQuery, RequestProfile
+
+    summary = ''
+    data = b''
+    if capture.profiling:
+        stats = pstats.Stats(capture.profiler)
+        data = marshal.dumps(stats.stats)
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+        summary = stream.getvalue()
+
+    slowest = sorted(
+        (index for index, (_, sql, params, _) in enumerate(capture.queries)
+         if params is not None and sql.lstrip()[:6].upper() == 'SELECT'),
+        key=lambda index: capture.queries[index][3], reverse=True
+    )[:settings.REQUEST_PROFILER_EXPLAIN_COUNT]
+    plans = {index: explain(*capture.queries[index][:3]) for index in slowest}
+
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=match.view_name if match else '',
+        status_code=response.status_code,
+        duration_ms=capture.duration * 1000,
+        query_count=len(capture.queries),
+        query_time_ms=sum(query[3] for query in capture.queries) * 1000,
+        profile_summary=summary,
+        profile_data=data,
+    )
+    ProfiledQuery.objects.bulk_create([
+        ProfiledQuery(
+            profile=profile,
+            position=index + 1,
+            database=alias,
+            sql=sql,
+            params='' if params is None else repr(params)[:2000],
+            duration_ms=seconds * 1000,
+            explain=plans.get(index, ''),
+        )
+        for index, (alias, sql, params, seconds) in enumerate(capture.queries)
+    ])
+    return profile
+
+
+class RequestProfilerMiddleware:
+    """Profile flagged admin requests; must come after AuthenticationMiddleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (_flagged(request) and _allowed(request)):
+            return self.get_response(request)
+
+        capture = Capture()
+        token = _capture.set(capture)
+        capture.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            capture.stop()
+            _capture.reset(token)
+        response['X-Profile-Id'] = str(save_profile(request, response, capture).id)
+        return response
+
+    async def __acall__(self, request):
+        if not (_flagged(request) and await sync_to_async(_allowed)(request)):
+            return await self.get_response(request)
+
+        capture = Capture()
+        token = _capture.set(capture)
+        view_is_async = _view_is_async(request)
+        if view_is_async:
+            capture.start()
+        else:
+            # Thread-sensitive calls of one request share a thread, the one the sync view runs in
+            await sync_to_async(capture.start)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if view_is_async:
+                capture.stop()
+            else:
+                await sync_to_async(capture.stop)()
+            _capture.reset(token)
+        profile = await sync_to_async(save_profile)(request, response, capture)
+        response['X-Profile-Id'] = str(profile.id)
+        return response
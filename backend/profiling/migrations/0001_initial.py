@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=500)),
+                ("view_name", models.CharField(blank=True, max_length=200)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("duration_ms", models.FloatField()),
+                ("query_count", models.PositiveIntegerField()),
+                ("query_time_ms", models.FloatField()),
+                ("profile_summary", models.TextField(blank=True)),
+                ("profile_data", models.BinaryField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "request_profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProfiledQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("database", models.CharField(max_length=50)),
+                ("sql", models.TextField()),
+                ("params", models.TextField(blank=True)),
+                ("duration_ms", models.FloatField()),
+                ("explain", models.TextField(blank=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="queries",
+                        to="profiling.requestprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "request_profile_queries",
+                "ordering": ["position"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="requestprofile",
+            index=models.Index(
+                fields=["created_at"], name="request_pro_created_48467a_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiling", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueryStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.DateTimeField()),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("view_name", models.CharField(max_length=200)),
+                ("sql", models.TextField()),
+                ("calls", models.BigIntegerField(default=0)),
+                ("total_ms", models.FloatField(default=0)),
+                ("max_ms", models.FloatField(default=0)),
+                ("sample_params", models.TextField(blank=True)),
+                ("sample_ms", models.FloatField(blank=True, null=True)),
+                ("sample_plan", models.TextField(blank=True)),
+                ("last_seen", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "query_stats",
+                "ordering": ["-period", "-total_ms"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="querystat",
+            constraint=models.UniqueConstraint(
+                fields=("period", "fingerprint", "view_name"),
+                name="query_stat_unique_period",
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+import uuid
+from django.db import models
+from django.conf import settings
+
+User = settings.AUTH_USER_MODEL
+
+
+class RequestProfile(models.Model):
+    """cProfile stats and SQL of one request, captured by profiling.middleware"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_time_ms = models.FloatField()
+
+    profile_summary = models.TextField(blank=True)  # pstats report, slowest functions first
+    profile_data = models.BinaryField(blank=True)  # marshalled pstats, as written by dump_stats
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'request_profiles'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class ProfiledQuery(models.Model):
+    profile = models.ForeignKey(RequestProfile, on_delete=models.CASCADE, related_name='queries')
+    position = models.PositiveIntegerField()
+    database = models.CharField(max_length=50)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    explain = models.TextField(blank=True)  # Plan for the slowest SELECTs only
+
+    class Meta:
+        db_table = 'request_profile_queries'
+        ordering = ['position']
+
+    def __str__(self):
+        return f"#{self.position} ({self.duration_ms:.1f} ms)"
+
+
+class QueryStat(models.Model):
+    """Hourly totals of one SQL fingerprint in one view or task, from profiling.query_stats"""
+    period = models.DateTimeField()  # Start of the hour
+    fingerprint = models.CharField(max_length=40)
+    view_name = models.CharField(max_length=200)
+    sql = models.TextField()  # Normalized statement
+
+    calls = models.BigIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+
+    # Slowest call over QUERY_STATS_SLOW_MS in the latest flush that had one
+    sample_params = models.TextField(blank=True)
+    sample_ms = models.FloatField(null=True, blank=True)
+    sample_plan = models.TextField(blank=True)
+
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        db_table = 'query_stats'
+        ordering = ['-period', '-total_ms']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'fingerprint', 'view_name'], name='query_stat_unique_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.view_name}: {self.sql[:60]}"
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
@@ -0,0 +1,243 @@
+"""
+Always-on SQL fingerprinting, for finding the queries that dominate load
+without access to ``pg_stat_statements``.
+
+A DB execute wrapper, installed on every new connection, normalizes each
+statement into a fingerprint (placeholders and literals become ``?``, IN lists
+and multi-row VALUES collapse) and adds its timing to an in-memory aggregate
+per fingerprint and scope. The scope is the view's URL name for requests
+(``QueryStatsMiddleware``), ``task:<name>`` inside Celery tasks, or
+``<middleware>``/``<other>`` for anything else.
+
+Every QUERY_STATS_FLUSH_SECONDS a background thread in each process adds its
+aggregates to the hourly ``QueryStat`` rows with F() updates. A statement
+slower than QUERY_STATS_SLOW_MS keeps its parameters as a sample, and the
+flusher EXPLAINs sampled SELECTs off the request path.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import IntegrityError, connections
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .middleware import explain
+
+logger = logging.getLogger(__name__)
+
+# The current request, or a label such as "task:<name>"
+_scope = ContextVar('query_stats_scope', default=None)
+# Set while flushing, so the flusher's own queries are not counted
+_suppressed = ContextVar('query_stats_suppressed', default=False)
+
+OVERFLOW_FINGERPRINT = 'overflow'
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES (\([^()]*\))(?:, \([^()]*\))+', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """``(key, normalized sql)`` for a statement"""
+    normalized = _SPACE_RE.sub(' ', sql).strip()
+    normalized = _STRING_RE.sub('?', normalized)
+    normalized = _SAVEPOINT_RE.sub('"?"', normalized)
+    normalized = normalized.replace('%s', '?')
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _IN_LIST_RE.sub('IN (...)', normalized)
+    normalized = _VALUES_RE.sub(r'VALUES \1, ...', normalized)
+    return hashlib.sha1(normalized.encode()).hexdigest(), normalized
+
+
+class Aggregator:
+    """Per-process totals: (fingerprint, scope) -> [sql, calls, seconds, max, sample]"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = {}
+        self._flusher_pid = None
+
+    def add(self, alias, sql, params, many, seconds, scope):
+        key, normalized = fingerprint(sql)
+        sample = None
+        if seconds * 1000 >= settings.QUERY_STATS_SLOW_MS and not many:
+            sample = (alias, sql, params, seconds)
+
+        self._ensure_flusher()
+        with self._lock:
+            entry = self.entries.get((key, scope))
+            if entry is None:
+                if len(self.entries) >= settings.QUERY_STATS_MAX_ENTRIES:
+                    key, normalized, sample = OVERFLOW_FINGERPRINT, '<fingerprints over QUERY_STATS_MAX_ENTRIES>', None
+                    entry = self.entries.get((key, scope))
+                if entry is None:
+                    entry = self.entries[key, scope] = [normalized, 0, 0.0, 0.0, None]
+            entry[1] += 1
+            entry[2] += seconds
+            entry[3] = max(entry[3], seconds)
+            if sample and (entry[4] is None or seconds > entry[4][3]):
+                entry[4] = sample
+
+    def take(self):
+        with self._lock:
+            entries, self.entries = self.entries, {}
+        return entries
+
+    def _ensure_flusher(self):
+        # Started on first use in each process: threads do not survive a fork
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=_flush_periodically, name='query-stats-flush', daemon=True).start()
+
+
+aggregator = Aggregator()
+
+
+def _current_scope():
+    scope = _scope.get()
+    if scope is None:
+        return '<other>'
+    if isinstance(scope, str):
+        return scope
+    match = scope.resolver_match
+    return match.view_name if match else '<middleware>'
+
+
+def record_query(execute, sql, params, many, context):
+    if _suppressed.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        aggregator.add(context['connection'].alias, sql, params, many,
+                       time.perf_counter() - started, _current_scope())
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if settings.QUERY_STATS_ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryStatsMiddleware:
+    """Attribute queries to the view serving the request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _scope.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _scope.reset(token)
+
+    async def __acall__(self, request):
+        token = _scope.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _scope.reset(token)
+
+
+_task_tokens = {}
+
+
+@task_prerun.connect
+def enter_task(task_id=None, task=None, **kwargs):
+    _task_tokens[task_id] = _scope.set(f'task:{task.name}')
+
+
+@task_postrun.connect
+def leave_task(task_id=None, **kwargs):
+    token = _task_tokens.pop(task_id, None)
+    if token is not None:
+        _scope.reset(token)
+
+
+def flush():
+    """Add this process's aggregates to the hourly QueryStat rows"""
+    from .models import QueryStat
+
+    entries = aggregator.take()
+    if not entries:
+        return 0
+
+    now = timezone.now()
+    period = now.replace(minute=0, second=0, microsecond=0)
+    token = _suppressed.set(True)
+    try:
+        for (key, scope), (normalized, calls, seconds, slowest, sample) in entries.items():
+            scope = scope[:200]
+            changes = {
+                'calls': F('calls') + calls,
+                'total_ms': F('total_ms') + seconds * 1000,
+                'max_ms': Greatest(F('max_ms'), slowest * 1000),
+                'last_seen': now,
+            }
+            if sample:
+                alias, sql, params, sample_seconds = sample
+                changes.update(
+                    sample_params=repr(params)[:2000],
+                    sample_ms=sample_seconds * 1000,
+                    sample_plan=(explain(alias, sql, params)
+                                 if sql.lstrip()[:6].upper() == 'SELECT' else ''),
+                )
+
+            rows = QueryStat.objects.filter(period=period, fingerprint=key, view_name=scope)
+            if rows.update(**changes):
+                continue
+            try:
+                QueryStat.objects.create(
+                    period=period, fingerprint=key, view_name=scope, sql=normalized,
+                    calls=calls, total_ms=seconds * 1000, max_ms=slowest * 1000, last_seen=now,
+                    **{name: value for name, value in changes.items() if name.startswith('sample_')}
+                )
+            except IntegrityError:
+                # Another process created the row since the update
+                rows.update(**changes)
+    finally:
+        _suppressed.reset(token)
+    return len(entries)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.QUERY_STATS_FLUSH_SECONDS)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not flush query stats')
+        finally:
+            # This thread's connections would otherwise sit idle until the next flush
+            connections.close_all()
@@ -0,0 +1,21 @@
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from .models import QueryStat, RequestProfile
+
+
+@shared_task
+def cleanup_request_profiles():
+    """Delete request profiles older than REQUEST_PROFILER_KEEP_DAYS"""
+    cutoff = timezone.now() - timedelta(days=settings.REQUEST_PROFILER_KEEP_DAYS)
+    deleted_count = RequestProfile.objects.filter(created_at__lt=cutoff).delete()[0]
+    return f"Cleaned up {deleted_count} request profiles"
+
+
+@shared_task
+def cleanup_query_stats():
+    """Delete hourly query stats older than QUERY_STATS_KEEP_DAYS"""
+    cutoff = timezone.now() - timedelta(days=settings.QUERY_STATS_KEEP_DAYS)
+    deleted_count = QueryStat.objects.filter(period__lt=cutoff).delete()[0]
+    return f"Cleaned up {deleted_count} query stats"
@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from .query_stats import fingerprint
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def assertSameFingerprint(self, first, second):
+        self.assertEqual(fingerprint(first)[0], fingerprint(second)[0])
+
+    def test_placeholders_and_literals(self):
+        key, normalized = fingerprint(
+            "SELECT * FROM tickets WHERE status = 'open' AND priority = %s AND comment_count > 10 LIMIT 21"
+        )
+        self.assertEqual(
+            normalized, 'SELECT * FROM tickets WHERE status = ? AND priority = ? AND comment_count > ? LIMIT ?'
+        )
+        self.assertSameFingerprint(
+            "SELECT * FROM tickets WHERE status = 'it''s closed' AND priority = 'low' AND comment_count > -2.5 LIMIT 1",
+            "SELECT * FROM tickets WHERE status = 'open' AND priority = %s AND comment_count > 10 LIMIT 21",
+        )
+
+    def test_whitespace_is_collapsed(self):
+        self.assertSameFingerprint('SELECT id\n  FROM   tickets ', 'SELECT id FROM tickets')
+
+    def test_identifiers_keep_their_digits(self):
+        _, normalized = fingerprint('SELECT "t1"."col2", v3 FROM "table_2024" AS t1 WHERE x = 5')
+        self.assertEqual(normalized, 'SELECT "t1"."col2", v3 FROM "table_2024" AS t1 WHERE x = ?')
+
+    def test_in_lists_collapse(self):
+        _, normalized = fingerprint('SELECT id FROM tickets WHERE id IN (%s, %s, %s)')
+        self.assertEqual(normalized, 'SELECT id FROM tickets WHERE id IN (...)')
+        self.assertSameFingerprint('SELECT id FROM tickets WHERE id IN (%s)',
+                                   'SELECT id FROM tickets WHERE id IN (1, 2, 3, 4)')
+
+    def test_multi_row_values_collapse(self):
+        _, normalized = fingerprint('INSERT INTO tags (name, count) VALUES (%s, %s), (%s, %s), (%s, %s)')
+        self.assertEqual(normalized, 'INSERT INTO tags (name, count) VALUES (?, ?), ...')
+        self.assertSameFingerprint('INSERT INTO tags (name, count) VALUES (%s, %s), (%s, %s)',
+                                   "INSERT INTO tags (name, count) VALUES ('a', 1), ('b', 2), ('c', 3)")
+
+    def test_savepoint_names(self):
+        self.assertSameFingerprint('SAVEPOINT "s140245_x1"', 'SAVEPOINT "s139876_x12"')
+
+    def test_different_statements_differ(self):
+        self.assertNotEqual(fingerprint('SELECT id FROM tickets')[0], fingerprint('SELECT id FROM users')[0])
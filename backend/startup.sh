@@ -1,10 +1,13 @@
 #!/bin/bash
 
-# Apply database migrations
-python manage.py migrate
+# Apply pending migrations and collect changed static files; each step is
+# skipped when there is nothing to do
+python manage.py prepare_boot
 
-# Collect static files
-python manage.py collectstatic --noinput
-
-# Start Gunicorn
-gunicorn --bind=0.0.0.0 --workers=4 ticketing_system.wsgi
+# Start Gunicorn (SERVER_MODE=asgi runs the ASGI app on uvicorn workers).
+# --preload imports the app once so workers share it copy-on-write
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn --bind=0.0.0.0 --workers=4 --preload --worker-class=uvicorn.workers.UvicornWorker ticketing_system.asgi:application
+else
+    gunicorn --bind=0.0.0.0 --workers=4 --preload ticketing_system.wsgi
+fi
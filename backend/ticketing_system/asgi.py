@@ -0,0 +1,35 @@
+"""
+ASGI config for ticketing_system project.
+
+WhiteNoise's middleware is sync-only, so under ASGI it is left out of
+MIDDLEWARE (see settings) and runs here instead, ahead of the async
+middleware chain, for requests under STATIC_URL. Those keep WhiteNoise's
+compressed variants and caching headers; only they take a thread for file I/O.
+"""
+
+import os
+
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.asgi import get_asgi_application
+from django.http import Http404
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticketing_system.settings')
+
+
+def _not_found(request):
+    raise Http404
+
+
+class StaticFilesHandler(ASGIStaticFilesHandler):
+    """Answer requests under STATIC_URL with WhiteNoise; pass the rest to Django"""
+
+    def __init__(self, application):
+        super().__init__(application)
+        self.whitenoise = WhiteNoiseMiddleware(get_response=_not_found)
+
+    def serve(self, request):
+        return self.whitenoise(request)
+
+
+application = StaticFilesHandler(get_asgi_application())
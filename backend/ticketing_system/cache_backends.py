@@ -0,0 +1,59 @@
+"""
+Cache backends that count hits and misses for ``/metrics``.
+
+Lookups are grouped by key namespace, the part of the key before the first
+``:`` (``staff_directory``, ``ticket_similarity``, ...). Keys without one
+are counted as ``other``.
+"""
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+
+from .metrics import registry
+
+_MISSING = object()
+
+
+def _namespace(key):
+    namespace, separator, _ = key.partition(':')
+    return namespace if separator else 'other'
+
+
+def _count(namespace, hits, misses):
+    if namespace == 'metrics' or not settings.METRICS_ENABLED:
+        return
+    if hits:
+        registry.inc('cache_requests_total', (namespace, 'hit'), hits)
+    if misses:
+        registry.inc('cache_requests_total', (namespace, 'miss'), misses)
+
+
+class CacheMetricsMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            _count(_namespace(key), 0, 1)
+            return default
+        _count(_namespace(key), 1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        namespaces = {}
+        for key in keys:
+            hits_misses = namespaces.setdefault(_namespace(key), [0, 0])
+            hits_misses[0 if key in found else 1] += 1
+        for namespace, (hits, misses) in namespaces.items():
+            _count(namespace, hits, misses)
+        return found
+
+
+class RedisCache(CacheMetricsMixin, BaseRedisCache):
+    pass
+
+
+class LocMemCache(CacheMetricsMixin, BaseLocMemCache):
+    # BaseCache.get_many calls get() per key, which already counts each lookup
+    get_many = BaseLocMemCache.get_many
@@ -1,5 +1,7 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
 from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
@@ -14,12 +16,69 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Record task durations for /metrics (connects Celery signal handlers)
+from . import metrics  # noqa: E402,F401
+
 # Configure Celery beat scheduler
 app.conf.beat_schedule = {
     'cleanup-old-notifications': {
         'task': 'notifications.tasks.cleanup_old_notifications',
         'schedule': 24 * 60 * 60.0,  # Run daily
     },
+    'cleanup-request-profiles': {
+        'task': 'profiling.tasks.cleanup_request_profiles',
+        'schedule': 24 * 60 * 60.0,  # Run daily
+    },
+    'cleanup-query-stats': {
+        'task': 'profiling.tasks.cleanup_query_stats',
+        'schedule': 24 * 60 * 60.0,  # Run daily
+    },
+    'scan-sla-breaches': {
+        'task': 'tickets.tasks.scan_sla_breaches',
+        'schedule': 5 * 60.0,  # Run every 5 minutes
+    },
+    'reconcile-assignee-workloads': {
+        'task': 'tickets.tasks.reconcile_assignee_workloads',
+        'schedule': crontab(minute=15),
+    },
+    'archive-closed-tickets': {
+        'task': 'tickets.tasks.archive_closed_tickets',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'send-hourly-email-digests': {
+        'task': 'notifications.tasks.send_email_digests',
+        'schedule': crontab(minute=0),
+        'args': ('hourly',),
+    },
+    'send-daily-email-digests': {
+        'task': 'notifications.tasks.send_email_digests',
+        'schedule': crontab(hour=7, minute=0),
+        'args': ('daily',),
+    },
+}
+
+# Work is split into queues by urgency so bulk jobs never delay alerts:
+#   realtime     SLA breach alerts and emails for urgent tickets
+#   standard     ticket notifications (the default)
+#   bulk         maintenance, archiving and index rebuilds
+#   attachments  heavy attachment processing
+# Every queue is declared so the broker routes to it and /metrics reports its
+# length. A worker started without -Q consumes all of them; the README's dev
+# worker passes `-X attachments` to leave previews to their own worker. In
+# production run one worker per queue with `python manage.py run_worker <queue>`,
+# which applies that queue's concurrency and prefetch from TASK_QUEUE_WORKERS.
+app.conf.task_queues = [Queue('realtime'), Queue('standard'), Queue('bulk'), Queue('attachments')]
+app.conf.task_default_queue = 'standard'
+app.conf.task_routes = {
+    'tickets.tasks.scan_sla_breaches': {'queue': 'realtime'},
+    'tickets.tasks.process_ticket_attachments': {'queue': 'attachments'},
+    'tickets.tasks.update_ticket_vector': {'queue': 'bulk'},
+    'tickets.tasks.rebuild_ticket_vectors': {'queue': 'bulk'},
+    'tickets.tasks.archive_closed_tickets': {'queue': 'bulk'},
+    'tickets.tasks.reconcile_assignee_workloads': {'queue': 'bulk'},
+    'notifications.tasks.cleanup_old_notifications': {'queue': 'bulk'},
+    'profiling.tasks.cleanup_request_profiles': {'queue': 'bulk'},
+    'profiling.tasks.cleanup_query_stats': {'queue': 'bulk'},
 }
 
 app.conf.timezone = 'UTC'
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+PostgreSQL backend that checks connections out of a per-process pool.
+
+Use it with ``'ENGINE': 'ticketing_system.db_pool'`` and ``CONN_MAX_AGE = 0``:
+Django then "closes" the connection at the end of each request, which
+returns it to the pool. Pool settings come from the ``POOL`` key of the
+database settings::
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 10, 'MAX_LIFETIME': 1800, 'PRE_PING': True}
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from psycopg2 import extensions
+
+from .pool import PoolTimeout, get_pool
+
+
+def reset_connection(connection):
+    """Roll back any open transaction; report whether the connection is reusable"""
+    if connection.closed:
+        return False
+    try:
+        if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except extensions.Error:
+        return False
+    return connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    def __init__(self, settings_dict, alias='default'):
+        super().__init__(settings_dict, alias)
+        if settings_dict.get('CONN_MAX_AGE'):
+            raise ImproperlyConfigured(
+                f"Database '{alias}' uses the pooled backend; set CONN_MAX_AGE to 0"
+            )
+
+    @property
+    def pool(self):
+        options = {key.lower(): value for key, value in self.settings_dict.get('POOL', {}).items()}
+        return get_pool(self.alias, dict(options, reset=reset_connection))
+
+    def connect_direct(self, conn_params):
+        """Open a connection without the pool"""
+        return super().get_new_connection(conn_params)
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.getconn(lambda: self.connect_direct(conn_params))
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
@@ -0,0 +1,226 @@
+"""
+Thread-safe DB-API connection pool.
+
+The pool does not know about any particular driver. Callers pass a
+``connect`` callable when checking out. ``ping`` and ``reset`` callables
+check a connection before it is handed out and clean it up when it comes
+back. Each process gets its own pools (see ``get_pool``), so pools created
+before a fork are never shared with the child.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, name, max_size=10, timeout=10.0, max_lifetime=1800.0, pre_ping=True,
+                 ping=None, reset=None):
+        self.name = name
+        self.pid = os.getpid()
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self._ping = ping or _ping
+        self._reset = reset or _reset
+
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._idle = deque()  # (connection, created_at), most recently returned last
+        self._in_use = {}  # id(connection) -> created_at
+        self._size = 0
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.ping_failures = 0
+
+    def getconn(self, connect):
+        """Return an idle connection, or a new one while below ``max_size``"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            connection, created_at = self._acquire_slot(deadline)
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._release_slot()
+                    raise
+                created_at = time.monotonic()
+                with self._lock:
+                    self.connections_opened += 1
+            elif self._expired(created_at) or (self.pre_ping and not self._check(connection)):
+                self._discard(connection)
+                continue
+            break
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._in_use[id(connection)] = created_at
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return connection
+
+    def putconn(self, connection):
+        """Return a connection; broken or expired ones are closed instead"""
+        with self._lock:
+            created_at = self._in_use.pop(id(connection), None)
+        if created_at is None:
+            # Not checked out from this pool (e.g. opened before a fork)
+            _close(connection)
+            return
+
+        if self._expired(created_at) or not self._reset(connection):
+            self._discard(connection)
+            return
+
+        with self._lock:
+            if not self._hand_over((connection, created_at)):
+                self._idle.append((connection, created_at))
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': len(self._waiters),
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'connections_opened': self.connections_opened,
+                'connections_closed': self.connections_closed,
+                'ping_failures': self.ping_failures,
+            }
+
+    def _acquire_slot(self, deadline):
+        """Pop an idle connection or reserve room for a new one (``None``)"""
+        with self._lock:
+            if not self._waiters:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+
+            # Queue up; returned connections and freed slots are handed to
+            # waiters in arrival order so no thread waits behind newcomers
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        if waiter.event.wait(max(0.0, deadline - time.monotonic())):
+            return waiter.result
+        with self._lock:
+            if waiter.event.is_set():
+                return waiter.result
+            self._waiters.remove(waiter)
+            self.timeouts += 1
+        raise PoolTimeout(
+            f"No connection available in pool '{self.name}' within {self.timeout}s "
+            f"({self.max_size} in use)"
+        )
+
+    def _hand_over(self, result):
+        """Give a connection (or a free slot) to the longest waiter; caller holds the lock"""
+        if not self._waiters:
+            return False
+        waiter = self._waiters.popleft()
+        waiter.result = result
+        waiter.event.set()
+        return True
+
+    def _release_slot(self):
+        with self._lock:
+            if not self._hand_over((None, None)):
+                self._size -= 1
+
+    def _expired(self, created_at):
+        return bool(self.max_lifetime) and time.monotonic() - created_at >= self.max_lifetime
+
+    def _check(self, connection):
+        if self._ping(connection):
+            return True
+        with self._lock:
+            self.ping_failures += 1
+        return False
+
+    def _discard(self, connection):
+        _close(connection)
+        with self._lock:
+            self.connections_closed += 1
+        self._release_slot()
+
+
+class _Waiter:
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+def _ping(connection):
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+def _reset(connection):
+    try:
+        connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def get_pool(alias, options):
+    """Return this process's pool for a database alias, creating it on first use"""
+    pool = _pools.get(alias)
+    if pool is None or pool.pid != os.getpid():
+        with _lock:
+            pool = _pools.get(alias)
+            if pool is None or pool.pid != os.getpid():
+                pool = ConnectionPool(alias, **options)
+                _pools[alias] = pool
+    return pool
+
+
+def pool_stats():
+    """Return ``{alias: stats}`` for every pool in this process"""
+    return {alias: pool.stats() for alias, pool in list(_pools.items()) if pool.pid == os.getpid()}
@@ -0,0 +1,79 @@
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+STATIC_HASH_FILE = '.source-hash'
+
+
+class Command(BaseCommand):
+    help = ('Run migrate and collectstatic at container start, skipping each one '
+            'when there is nothing to do')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Run both steps unconditionally')
+
+    def handle(self, *args, **options):
+        self.timed('migrate', self.migrate, options['force'])
+        self.timed('collectstatic', self.collectstatic, options['force'])
+
+    def timed(self, label, step, force):
+        started = time.monotonic()
+        ran = step(force)
+        self.stdout.write(f"{label}: {'done' if ran else 'skipped, nothing changed'} "
+                          f"({time.monotonic() - started:.2f}s)")
+
+    def migrate(self, force):
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan and not force:
+            return False
+        call_command('migrate', interactive=False, verbosity=1)
+        return True
+
+    def collectstatic(self, force):
+        source_hash = static_source_hash()
+        hash_path = os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+        if not force and self.static_is_current(hash_path, source_hash):
+            return False
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(hash_path, 'w') as hash_file:
+            hash_file.write(source_hash)
+        return True
+
+    def static_is_current(self, hash_path, source_hash):
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        if manifest_name and not os.path.exists(os.path.join(settings.STATIC_ROOT, manifest_name)):
+            return False
+        try:
+            with open(hash_path) as hash_file:
+                return hash_file.read().strip() == source_hash
+        except FileNotFoundError:
+            return False
+
+
+def static_source_hash():
+    """Hash every file collectstatic would copy, plus the storage backend in use"""
+    digest = hashlib.sha256(settings.STATICFILES_STORAGE.encode())
+    files = {}
+    for finder in finders.get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            # The first finder to provide a path wins, as in collectstatic
+            prefixed_path = os.path.join(getattr(storage, 'prefix', None) or '', path)
+            files.setdefault(prefixed_path, (storage, path))
+
+    for prefixed_path in sorted(files):
+        storage, path = files[prefixed_path]
+        digest.update(prefixed_path.encode())
+        with storage.open(path) as source:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,71 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a web worker imports before serving its first request
+BOOT_CODE = (
+    'import django; django.setup(); '
+    'import ticketing_system.urls, ticketing_system.celery, ticketing_system.wsgi'
+)
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = 'Report import time for a web worker boot using python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Rows per section')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = LINE_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+        total = sum(cumulative for _, _, cumulative, depth in modules if depth == 0)
+        self.stdout.write(f'{len(modules)} modules imported in {total / 1000:.0f}ms')
+
+        limit = options['limit']
+        self.section('Slowest imports (cumulative, includes what they import)',
+                     sorted(((name, cumulative) for name, _, cumulative, _ in modules),
+                            key=lambda row: row[1], reverse=True)[:limit], total)
+
+        packages = defaultdict(int)
+        for name, self_us, _, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        self.section('Time by top-level package (self time)',
+                     sorted(packages.items(), key=lambda row: row[1], reverse=True)[:limit], total)
+
+        # Installed apps that live in this repository rather than site-packages
+        project_packages = {
+            config.name.split('.')[0] for config in apps.get_app_configs()
+            if os.path.realpath(config.path).startswith(os.path.realpath(settings.BASE_DIR) + os.sep)
+        }
+        project = [(name, cumulative) for name, _, cumulative, _ in modules
+                   if name.split('.')[0] in project_packages]
+        self.section('Project modules (cumulative)',
+                     sorted(project, key=lambda row: row[1], reverse=True)[:limit], total)
+
+    def section(self, title, rows, total):
+        self.stdout.write(f'\n{title}')
+        for name, microseconds in rows:
+            share = microseconds / total * 100 if total else 0
+            self.stdout.write(f'  {microseconds / 1000:>8.1f}ms {share:>5.1f}%  {name}')
@@ -0,0 +1,506 @@
+"""
+Application metrics in Prometheus text format.
+
+Each process (web worker or Celery worker) records into its own in-memory
+``registry``:
+
+* ``MetricsMiddleware`` records request latency, SQL query count and SQL
+  time per URL name.
+* A DB execute wrapper, installed on every new connection, adds each
+  query to the current request's totals.
+* The cache backends in ``ticketing_system.cache_backends`` count hits
+  and misses per key namespace.
+* Celery signals record task durations and outcomes, and how long each
+  task waited in its queue (publish time travels in a message header).
+
+Every ``METRICS_FLUSH_SECONDS`` a background thread in each process writes
+a snapshot of its registry to the shared cache, off the request path.
+``/metrics`` adds up the snapshots and appends gauges computed at scrape
+time (unsent notifications, Celery queue lengths).
+
+The summed counters must never go down, or ``rate()`` would read the drop
+as a reset and spike. So when a process stops flushing (it exited, or was
+recycled by gunicorn's max_requests), the scrape that notices folds its
+last snapshot into a retained ``metrics:retired`` total, much like
+prometheus_client's multiprocess mode keeps the files of dead processes.
+Up to one flush interval of a dead process's counts is lost. A process
+that turns out to have only stalled finds itself retired on its next flush
+and starts counting from zero, so nothing is counted twice.
+"""
+
+import bisect
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.crypto import get_random_string
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+COUNTERS = {
+    'http_requests_total': 'HTTP requests by URL name, method and status code',
+    'cache_requests_total': 'Cache lookups by key namespace and result',
+    'celery_tasks_total': 'Finished Celery tasks by name and state',
+    'db_pool_checkouts_total': 'Connections checked out of the pool',
+    'db_pool_timeouts_total': 'Pool checkouts that timed out',
+    'db_pool_wait_seconds_total': 'Time spent waiting for pooled connections',
+}
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency by URL name', LATENCY_BUCKETS),
+    'http_request_db_queries': ('SQL queries per request by URL name', QUERY_COUNT_BUCKETS),
+    'http_request_db_seconds': ('SQL time per request by URL name', LATENCY_BUCKETS),
+    'celery_task_duration_seconds': ('Celery task run time by task name', LATENCY_BUCKETS + (30.0, 60.0, 300.0)),
+    'celery_queue_wait_seconds': ('Time between publishing a task and a worker starting it, by queue',
+                                  LATENCY_BUCKETS + (30.0, 60.0, 300.0)),
+}
+GAUGES = {
+    'db_pool_connections': 'Pooled connections by state',
+    'cache_hit_ratio': 'Cache hits / lookups by key namespace',
+    'notifications_unsent': 'Email notifications not yet sent',
+    'celery_queue_length': 'Messages waiting in each Celery queue',
+}
+
+HOSTNAME = socket.gethostname()
+PROCESS_INDEX_KEY = 'metrics:processes'
+RETIRED_KEY = 'metrics:retired'
+INDEX_LOCK_KEY = 'metrics:index_lock'
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._flusher_pid = None
+        self._process_id = None
+        self.pool_baseline = {}  # alias -> pool stats at the last reset
+
+    @property
+    def process_id(self):
+        # Unique per process lifetime, so a restarted container reusing a pid
+        # never takes over the snapshot of the process it replaced
+        if self._process_id is None or self._process_id[1] != os.getpid():
+            self._process_id = (f'{HOSTNAME}:{os.getpid()}:{get_random_string(8)}', os.getpid())
+        return self._process_id[0]
+
+    def inc(self, name, labels, value=1):
+        self._ensure_flusher()
+        with self._lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        index = bisect.bisect_left(buckets, value)
+        self._ensure_flusher()
+        with self._lock:
+            series = self.histograms.get((name, labels))
+            if series is None:
+                series = self.histograms[name, labels] = [0] * (len(buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _ensure_flusher(self):
+        # Started on first use in each process: threads do not survive a fork
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=_flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {key: list(series) for key, series in self.histograms.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.pool_baseline = _pool_stats()
+
+
+registry = Registry()
+
+# Per-request totals that the execute wrapper adds to: [query count, seconds]
+_request_db = ContextVar('metrics_request_db', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    totals = _request_db.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_db.reset(token)
+        self.record(request, response, time.perf_counter() - started, totals)
+        return response
+
+    async def __acall__(self, request):
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_db.reset(token)
+        self.record(request, response, time.perf_counter() - started, totals)
+        return response
+
+    def record(self, request, response, duration, totals):
+        match = request.resolver_match
+        view = match.view_name if match else '<unmatched>'
+        registry.inc('http_requests_total', (view, request.method, str(response.status_code)))
+        registry.observe('http_request_duration_seconds', (view,), duration)
+        registry.observe('http_request_db_queries', (view,), totals[0])
+        registry.observe('http_request_db_seconds', (view,), totals[1])
+
+
+_task_started = {}
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    headers['published_at'] = time.time()
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at and settings.METRICS_ENABLED:
+        queue = (task.request.delivery_info or {}).get('routing_key') or 'unknown'
+        registry.observe('celery_queue_wait_seconds', (queue,), max(0.0, time.time() - published_at))
+
+
+@task_postrun.connect
+def record_task(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None or not settings.METRICS_ENABLED:
+        return
+    registry.observe('celery_task_duration_seconds', (task.name,), time.perf_counter() - started)
+    registry.inc('celery_tasks_total', (task.name, state or 'UNKNOWN'))
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not publish metrics')
+
+
+@contextmanager
+def _index_lock(cache, wait=5.0):
+    """Serialize changes to the process index across processes (``add`` is atomic)"""
+    deadline = time.monotonic() + wait
+    while not cache.add(INDEX_LOCK_KEY, 1, 30):
+        if time.monotonic() > deadline:
+            raise TimeoutError('metrics process index is locked')
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(INDEX_LOCK_KEY)
+
+
+def _snapshot_key(process_id):
+    return f'metrics:process:{process_id}'
+
+
+def _retired_marker_key(process_id):
+    return f'metrics:retired_process:{process_id}'
+
+
+def flush():
+    """Publish this process's snapshot to the shared cache"""
+    from django.core.cache import cache
+
+    # Worker processes fork from a preloaded master, so the id is read here
+    process_id = registry.process_id
+    _publish(cache, process_id)
+    if process_id in (cache.get(PROCESS_INDEX_KEY) or set()):
+        return
+
+    with _index_lock(cache):
+        if cache.get(_retired_marker_key(process_id)):
+            # A scrape took this process for dead and kept its last snapshot;
+            # carry on from zero so those counts are not added again
+            registry.reset()
+            _publish(cache, process_id)
+            cache.delete(_retired_marker_key(process_id))
+        cache.set(PROCESS_INDEX_KEY, (cache.get(PROCESS_INDEX_KEY) or set()) | {process_id}, None)
+
+
+POOL_COUNTERS = {
+    'checkouts': 'db_pool_checkouts_total',
+    'timeouts': 'db_pool_timeouts_total',
+    'wait_seconds_total': 'db_pool_wait_seconds_total',
+}
+POOL_STATES = ('idle', 'in_use', 'waiting')
+
+
+def _publish(cache, process_id):
+    snapshot = registry.snapshot()
+    snapshot['pools'] = {}
+    for alias, stats in _pool_stats().items():
+        # Pool totals are counters like the registry's, so they are retained
+        # with it; what the pool counted before a reset is subtracted
+        baseline = registry.pool_baseline.get(alias, {})
+        for stat, name in POOL_COUNTERS.items():
+            snapshot['counters'][name, (alias,)] = stats[stat] - baseline.get(stat, 0)
+        snapshot['pools'][alias] = {state: stats[state] for state in POOL_STATES}
+    snapshot['flushed_at'] = time.time()
+    cache.set(_snapshot_key(process_id), snapshot, None)
+
+
+def _pool_stats():
+    from .db_pool.pool import pool_stats
+    return pool_stats()
+
+
+def _is_stale(snapshot, now):
+    return snapshot is None or now - snapshot['flushed_at'] > settings.METRICS_FLUSH_SECONDS * 3
+
+
+def _add_series(counters, histograms, snapshot):
+    for key, value in snapshot['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, series in snapshot['histograms'].items():
+        total = histograms.setdefault(key, [0] * len(series))
+        for position, value in enumerate(series):
+            total[position] += value
+
+
+def _retire(cache, processes):
+    """Fold the last snapshots of processes that stopped flushing into the retained total"""
+    with _index_lock(cache):
+        index = cache.get(PROCESS_INDEX_KEY) or set()
+        keys = {process: _snapshot_key(process) for process in processes & index}
+        snapshots = cache.get_many(list(keys.values()))
+        now = time.time()
+        # Re-checked under the lock: another scrape may have retired them, or they flushed since
+        dead = {process for process, key in keys.items() if _is_stale(snapshots.get(key), now)}
+        if not dead:
+            return
+
+        retired = cache.get(RETIRED_KEY) or {'counters': {}, 'histograms': {}}
+        for process in dead:
+            if snapshots.get(keys[process]) is not None:
+                _add_series(retired['counters'], retired['histograms'], snapshots[keys[process]])
+        # One write, so a scrape never sees a snapshot both retired and still live
+        cache.set_many({RETIRED_KEY: retired, **{keys[process]: None for process in dead}}, None)
+        cache.set_many({_retired_marker_key(process): 1 for process in dead}, 24 * 60 * 60)
+        cache.set(PROCESS_INDEX_KEY, index - dead, None)
+        cache.delete_many([keys[process] for process in dead])
+
+
+def _read(cache):
+    index = cache.get(PROCESS_INDEX_KEY) or set()
+    values = cache.get_many([RETIRED_KEY] + [_snapshot_key(process) for process in index])
+    return index, values.pop(RETIRED_KEY, None), values
+
+
+def collect():
+    """Add up the retained total and the snapshots of every live process"""
+    from django.core.cache import cache
+
+    flush()
+    index, retired, snapshots = _read(cache)
+    now = time.time()
+    stale = {process for process in index if _is_stale(snapshots.get(_snapshot_key(process)), now)}
+    if stale:
+        try:
+            _retire(cache, stale)
+        except TimeoutError:
+            # Their last snapshots are still counted; a later scrape retires them
+            logger.warning('Could not retire the metrics of %d stopped processes', len(stale))
+        else:
+            index, retired, snapshots = _read(cache)
+
+    counters = defaultdict(float)
+    histograms = {}
+    pools = defaultdict(lambda: defaultdict(float))
+    if retired is not None:
+        _add_series(counters, histograms, retired)
+    for snapshot in snapshots.values():
+        if snapshot is None:
+            continue
+        _add_series(counters, histograms, snapshot)
+        if not _is_stale(snapshot, now):
+            for alias, stats in snapshot.get('pools', {}).items():
+                for stat, value in stats.items():
+                    pools[alias][stat] += value
+    return counters, histograms, pools
+
+
+def render():
+    counters, histograms, pools = collect()
+    gauges = defaultdict(dict)
+
+    for alias, stats in pools.items():
+        for state in POOL_STATES:
+            gauges['db_pool_connections'][alias, state] = stats[state]
+
+    lookups = defaultdict(lambda: [0, 0])
+    for (name, labels), value in counters.items():
+        if name == 'cache_requests_total':
+            namespace, result = labels
+            lookups[namespace][0 if result == 'hit' else 1] += value
+    for namespace, (hits, misses) in lookups.items():
+        gauges['cache_hit_ratio'][namespace,] = hits / (hits + misses)
+
+    gauges['notifications_unsent'][()] = _unsent_notifications()
+    for queue, length in _queue_lengths().items():
+        gauges['celery_queue_length'][queue,] = length
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        series = {labels: value for (metric, labels), value in counters.items() if metric == name}
+        _write_family(lines, name, help_text, 'counter', series)
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            label_text = _labels(name, labels)
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(name, labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{label_text} {_number(series[-1])}')
+            lines.append(f'{name}_count{label_text} {cumulative}')
+    for name, help_text in GAUGES.items():
+        _write_family(lines, name, help_text, 'gauge', gauges[name])
+    return '\n'.join(lines) + '\n'
+
+
+LABEL_NAMES = {
+    'http_requests_total': ('view', 'method', 'status'),
+    'http_request_duration_seconds': ('view',),
+    'http_request_db_queries': ('view',),
+    'http_request_db_seconds': ('view',),
+    'cache_requests_total': ('namespace', 'result'),
+    'cache_hit_ratio': ('namespace',),
+    'celery_tasks_total': ('task', 'state'),
+    'celery_task_duration_seconds': ('task',),
+    'celery_queue_wait_seconds': ('queue',),
+    'celery_queue_length': ('queue',),
+    'db_pool_checkouts_total': ('database',),
+    'db_pool_timeouts_total': ('database',),
+    'db_pool_wait_seconds_total': ('database',),
+    'db_pool_connections': ('database', 'state'),
+    'notifications_unsent': (),
+}
+
+
+def _labels(name, values, le=None):
+    pairs = list(zip(LABEL_NAMES[name], values))
+    if le is not None:
+        pairs.append(('le', le))
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def _write_family(lines, name, help_text, metric_type, series):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for labels, value in sorted(series.items()):
+        lines.append(f'{name}{_labels(name, labels)} {_number(value)}')
+
+
+def _unsent_notifications():
+    from notifications.models import Notification
+    return Notification.objects.filter(notification_type__in=['email', 'both'], is_sent=False).count()
+
+
+def _queue_lengths():
+    """Return ``{queue: messages waiting}``; empty if the broker is unreachable"""
+    from .celery import app
+
+    queues = {app.conf.task_default_queue}
+    queues |= {queue.name for queue in app.conf.task_queues or []}
+    queues |= {route['queue'] for route in (app.conf.task_routes or {}).values() if 'queue' in route}
+    lengths = {}
+    try:
+        with app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1, interval_start=0)
+            channel = connection.default_channel
+            for queue in sorted(queues):
+                try:
+                    lengths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except connection.channel_errors:
+                    lengths[queue] = 0
+    except Exception:
+        return {}
+    return lengths
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN as a bearer token, or an admin session"""
+    from django.http import HttpResponse, HttpResponseForbidden
+    from django.utils.crypto import constant_time_compare
+
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if token and constant_time_compare(authorization, f'Bearer {token}'):
+        pass
+    elif not (request.user.is_authenticated and request.user.is_admin):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
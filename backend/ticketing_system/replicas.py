@@ -0,0 +1,104 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Views opt in with ``@replica_reads``. For GET/HEAD requests to those views,
+``ReplicaMiddleware`` lets ``ReplicaRouter`` send ORM reads to one of the
+``REPLICA_DATABASES``; everything else, including all writes, uses
+``default``.
+
+Any other request (a POST, a form submit, a logout) sets a short-lived
+cookie that pins the browser to the primary for ``REPLICA_PIN_SECONDS``,
+so users see their own changes before the replicas catch up.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Apps whose reads must always see the latest write. ``users`` holds the
+# custom user model, so request.user (its session hash and is_active) is
+# never loaded from a lagging replica
+PRIMARY_ONLY_APPS = {'sessions', 'contenttypes', 'auth', 'users', 'migrations'}
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_reads(view):
+    """Mark a view (function or class) as safe to serve from a replica"""
+    view.replica_reads = True
+    return view
+
+
+def _wants_replica(request):
+    if not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+        return False
+    if PIN_COOKIE in request.COOKIES:
+        return False
+    try:
+        view = resolve(request.path_info).func
+    except Resolver404:
+        return False
+    return getattr(getattr(view, 'view_class', view), 'replica_reads', False)
+
+
+def _pin_to_primary(request, response):
+    if request.method not in SAFE_METHODS:
+        response.set_cookie(
+            PIN_COOKIE, '1',
+            max_age=settings.REPLICA_PIN_SECONDS,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _use_replica.set(_wants_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        return _pin_to_primary(request, response)
+
+    async def __acall__(self, request):
+        token = _use_replica.set(_wants_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+        return _pin_to_primary(request, response)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,47 @@
+"""
+Write-throttled, cache-backed session engine with database fallback.
+
+Behaves like ``django.contrib.sessions.backends.cached_db`` but, with
+``SESSION_SAVE_EVERY_REQUEST`` enabled, only writes the session when its
+data changed or when the stored copy was last written more than
+``SESSION_WRITE_STALE_FRACTION`` of its lifetime ago.
+
+The session cookie is still refreshed on every response. Stored copies
+are kept for that stale fraction longer than the cookie age, so the
+server-side session always outlives the browser's 24h sliding expiry.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+LAST_WRITE_KEY = '_session_written_at'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'ticketing_system.sessions'
+
+    def _grace_seconds(self):
+        return int(self.get_expiry_age() * settings.SESSION_WRITE_STALE_FRACTION)
+
+    def _is_stale(self):
+        written_at = self._get_session().get(LAST_WRITE_KEY)
+        if written_at is None:
+            return True
+        return time.time() - written_at >= self._grace_seconds()
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key and not self.modified and not self._is_stale():
+            return
+
+        self[LAST_WRITE_KEY] = int(time.time())
+        DBStore.save(self, must_create)
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age() + self._grace_seconds())
+
+    def create_model_instance(self, data):
+        instance = super().create_model_instance(data)
+        instance.expire_date = self.get_expiry_date() + timedelta(seconds=self._grace_seconds())
+        return instance
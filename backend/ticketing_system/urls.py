@@ -5,6 +5,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,6 +13,7 @@ urlpatterns = [
     path('users/', include('users.urls')),
     path('tickets/', include('tickets.urls')),
     path('notifications/', include('notifications.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
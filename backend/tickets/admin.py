@@ -1,12 +1,39 @@
 from django.contrib import admin
-from .models import Ticket, Comment, TicketStatusHistory
+from ticketing_system.admin_performance import AutocompleteFilter, PerformanceModeAdmin
+from .models import (
+    Ticket, Comment, TicketStatusHistory, AttachmentPreview, TaskWatermark, AssigneeWorkload, ArchivedTicket,
+    SavedSearch
+)
+
+
+class OverdueFilter(admin.SimpleListFilter):
+    title = 'overdue'
+    parameter_name = 'overdue'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('yes', 'Yes'),
+            ('no', 'No'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            # Uses the partial due_date index
+            return queryset.overdue()
+        if self.value() == 'no':
+            return queryset.filter(overdue=False)
+        return queryset
 
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(PerformanceModeAdmin):
     list_display = ('title', 'created_by', 'assigned_to', 'status', 'priority', 'category', 'created_at', 'is_overdue')
-    list_filter = ('status', 'priority', 'category', 'created_at', 'assigned_to')
+    list_filter = ('status', 'priority', 'category', OverdueFilter, 'created_at', 'assigned_to')
     search_fields = ('title', 'description', 'created_by__email', 'created_by__first_name', 'created_by__last_name')
+    performance_list_filter = ('status', 'priority', 'category', OverdueFilter, ('assigned_to', AutocompleteFilter))
+    performance_autocomplete_fields = ('created_by', 'assigned_to')
+    search_text_field = 'title'
+    search_user_field = 'created_by'
     list_editable = ('status', 'priority', 'assigned_to')
     readonly_fields = ('id', 'created_at', 'updated_at', 'closed_at', 'resolution_time')
     date_hierarchy = 'created_at'
@@ -24,20 +51,29 @@ class TicketAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        obj._changed_by_id = request.user.id
+        super().save_model(request, obj, form, change)
+
     def is_overdue(self, obj):
-        return obj.is_overdue
+        return obj.overdue
     is_overdue.boolean = True
     is_overdue.short_description = 'Overdue'
+    is_overdue.admin_order_field = 'overdue'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('created_by', 'assigned_to')
+        return super().get_queryset(request).select_related('created_by', 'assigned_to').with_overdue()
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(PerformanceModeAdmin):
     list_display = ('ticket', 'author', 'comment_type', 'created_at')
     list_filter = ('comment_type', 'created_at', 'ticket__status')
     search_fields = ('content', 'ticket__title', 'author__email')
+    performance_list_filter = ('comment_type', ('author', AutocompleteFilter), ('ticket', AutocompleteFilter))
+    performance_autocomplete_fields = ('ticket', 'author')
+    search_text_field = 'content'
+    search_user_field = 'author'
     readonly_fields = ('id', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
 
@@ -46,12 +82,70 @@ class CommentAdmin(admin.ModelAdmin):
 
 
 @admin.register(TicketStatusHistory)
-class TicketStatusHistoryAdmin(admin.ModelAdmin):
+class TicketStatusHistoryAdmin(PerformanceModeAdmin):
     list_display = ('ticket', 'old_status', 'new_status', 'changed_by', 'changed_at')
     list_filter = ('new_status', 'old_status', 'changed_at')
     search_fields = ('ticket__title', 'changed_by__email', 'notes')
+    performance_list_filter = ('new_status', 'old_status', ('changed_by', AutocompleteFilter), ('ticket', AutocompleteFilter))
+    performance_autocomplete_fields = ('ticket', 'changed_by')
+    search_text_field = 'notes'
+    search_user_field = 'changed_by'
     readonly_fields = ('id', 'changed_at')
     date_hierarchy = 'changed_at'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('ticket', 'changed_by')
\ No newline at end of file
+        return super().get_queryset(request).select_related('ticket', 'changed_by')
+
+
+@admin.register(AttachmentPreview)
+class AttachmentPreviewAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'kind', 'status', 'created_at', 'processed_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('file_name', 'content_hash')
+    readonly_fields = ('id', 'content_hash', 'thumbnail', 'extracted_text', 'error', 'created_at', 'processed_at')
+    exclude = ('tickets',)
+
+
+@admin.register(TaskWatermark)
+class TaskWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(AssigneeWorkload)
+class AssigneeWorkloadAdmin(admin.ModelAdmin):
+    list_display = ('user', 'open_tickets', 'last_assigned_at')
+    readonly_fields = ('open_tickets', 'last_assigned_at')
+    fields = ('user', 'categories', 'open_tickets', 'last_assigned_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'anchor', 'alerts_enabled', 'created_at')
+    list_filter = ('alerts_enabled',)
+    search_fields = ('name', 'user__email')
+    readonly_fields = ('anchor', 'created_at')
+    autocomplete_fields = ('user', 'assigned_to')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    """Read-only view of tickets moved to the archive tables"""
+    list_display = ('title', 'created_by', 'assigned_to', 'priority', 'category', 'closed_at', 'archived_at')
+    list_filter = ('priority', 'category')
+    search_fields = ('title',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('created_by', 'assigned_to')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'tickets'
\ No newline at end of file
+    name = 'tickets'
+
+    def ready(self):
+        from . import signals  # noqa: F401
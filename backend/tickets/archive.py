@@ -0,0 +1,133 @@
+"""
+Cold archive for long-closed tickets.
+
+Closed tickets make up most of the ``tickets`` table, so ``archive_closed_tickets``
+moves those closed more than TICKET_ARCHIVE_AFTER_DAYS ago, with their comments
+and status history, into the ``archived_*`` tables. Each chunk is copied and
+deleted in one transaction, so an interrupted run leaves every ticket in exactly
+one place and the next run carries on from there. Rows locked by a concurrent
+edit are skipped and picked up by a later run.
+
+Notifications and attachment preview links are dropped with the live row.
+Similarity vectors are kept, so archived tickets are still recommended as
+similar resolved work. The ticket list reads the archive when filtering for
+closed tickets, and the detail page falls back to it for direct links.
+"""
+
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from .similarity import bump_generation
+from .models import (
+    Ticket, Comment, TicketStatusHistory,
+    ArchivedTicket, ArchivedComment, ArchivedStatusHistory,
+)
+
+
+_archiving = ContextVar('ticket_archiving', default=False)
+
+
+def is_archiving():
+    """True while archive_chunk deletes the tickets it has copied"""
+    return _archiving.get()
+
+
+def _copy(instance, model):
+    """Build an unsaved ``model`` row from the matching columns of ``instance``"""
+    attnames = {field.attname for field in model._meta.concrete_fields}
+    return model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields if field.attname in attnames
+    })
+
+
+def archive_chunk(cutoff, size):
+    """Archive up to ``size`` tickets closed before ``cutoff``; returns how many moved"""
+    with transaction.atomic():
+        tickets = list(
+            Ticket.objects.select_for_update(skip_locked=True)
+            .filter(status='closed', closed_at__lt=cutoff)
+            .order_by('closed_at')[:size]
+        )
+        if not tickets:
+            return 0
+
+        ids = [ticket.id for ticket in tickets]
+        ArchivedTicket.objects.bulk_create([
+            _copy(ticket, ArchivedTicket) for ticket in tickets
+        ])
+        ArchivedComment.objects.bulk_create([
+            _copy(comment, ArchivedComment) for comment in Comment.objects.filter(ticket_id__in=ids)
+        ])
+        ArchivedStatusHistory.objects.bulk_create([
+            _copy(history, ArchivedStatusHistory)
+            for history in TicketStatusHistory.objects.filter(ticket_id__in=ids)
+        ])
+        token = _archiving.set(True)
+        try:
+            Ticket.objects.filter(id__in=ids).delete()
+        finally:
+            _archiving.reset(token)
+        # Cached recommendations were looked up while these rows were live
+        transaction.on_commit(bump_generation)
+    return len(ids)
+
+
+def archive_closed_tickets(days=None, chunk_size=None, pause=None):
+    """Archive every eligible ticket, one chunk per transaction; returns the total moved"""
+    days = settings.TICKET_ARCHIVE_AFTER_DAYS if days is None else days
+    chunk_size = chunk_size or settings.TICKET_ARCHIVE_CHUNK_SIZE
+    pause = settings.TICKET_ARCHIVE_PAUSE_SECONDS if pause is None else pause
+    cutoff = timezone.now() - timedelta(days=days)
+
+    total = 0
+    while True:
+        moved = archive_chunk(cutoff, chunk_size)
+        total += moved
+        if moved < chunk_size:
+            return total
+        # Give the primary and its replicas room between chunks
+        time.sleep(pause)
+
+
+class CombinedTickets:
+    """Live and archived tickets as one ordered, countable, sliceable list
+
+    Only the ordered keys of the requested page come from the UNION; the rows
+    are then loaded from each table with one ``id__in`` query apiece. Meant to
+    be handed to ``Paginator``.
+    """
+    ordered = True
+
+    def __init__(self, live, archived, ordering):
+        self.live = live
+        self.archived = archived
+        self.ordering = ordering
+
+    def count(self):
+        return self.live.count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        columns = ['id', 'archived'] + [field.lstrip('-') for field in self.ordering]
+        keys = (
+            self.live.order_by().annotate(archived=Value(False)).values_list(*columns)
+            .union(self.archived.order_by().annotate(archived=Value(True)).values_list(*columns), all=True)
+            .order_by(*self.ordering)[index]
+        )
+        keys = [(pk, archived) for pk, archived, *_ in keys]
+
+        live = self.live.in_bulk([pk for pk, archived in keys if not archived])
+        archived = self.archived.in_bulk([pk for pk, archived in keys if archived])
+        return [archived[pk] if is_archived else live[pk] for pk, is_archived in keys]
@@ -0,0 +1,107 @@
+"""
+Automatic assignment of new tickets to automation team members.
+
+The policy is selected with the ``TICKET_AUTO_ASSIGN_POLICY`` setting:
+
+- ``least_loaded``: the member with the fewest open tickets
+- ``round_robin``: the member who was assigned a ticket longest ago
+- ``category_affinity``: least loaded among members who prefer the
+  ticket's category, falling back to the whole team
+
+Choices are made from the ``AssigneeWorkload`` counters rather than
+counting tickets, and the candidate rows are locked for the rest of the
+transaction so concurrent creations see each other's assignments. The
+counters follow saved instances only, so queryset updates and saves of
+deferred-field instances make them drift; ``reconcile_workloads`` (hourly,
+from Celery beat) recounts them.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Ticket, AssigneeWorkload, ACTIVE_STATUSES
+
+POLICIES = ('least_loaded', 'round_robin', 'category_affinity')
+
+
+def get_policy():
+    policy = getattr(settings, 'TICKET_AUTO_ASSIGN_POLICY', '')
+    return policy if policy in POLICIES else None
+
+
+def ensure_workloads(user_ids):
+    """Create missing workload rows, seeding them with a one-off count"""
+    existing = set(
+        AssigneeWorkload.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if not missing:
+        return
+
+    counts = dict(
+        Ticket.objects.filter(
+            assigned_to_id__in=missing, status__in=ACTIVE_STATUSES
+        ).values('assigned_to').annotate(count=Count('id')).values_list('assigned_to', 'count')
+    )
+    AssigneeWorkload.objects.bulk_create(
+        [AssigneeWorkload(user_id=user_id, open_tickets=counts.get(user_id, 0)) for user_id in missing],
+        ignore_conflicts=True
+    )
+
+
+def choose_assignee(ticket, policy=None):
+    """
+    Pick an assignee for ``ticket`` according to the policy.
+
+    Must be called inside a transaction; the workload rows of all
+    candidates stay locked until it commits.
+    """
+    from users.directory import get_staff_ids
+
+    policy = policy or get_policy()
+    if not policy:
+        return None
+
+    team = get_staff_ids(role='automation_team')
+    if not team:
+        return None
+    ensure_workloads(team)
+
+    workloads = AssigneeWorkload.objects.select_for_update(of=('self',)).filter(
+        user_id__in=team
+    ).select_related('user')
+
+    never_assigned_first = F('last_assigned_at').asc(nulls_first=True)
+    if policy == 'round_robin':
+        workloads = workloads.order_by(never_assigned_first, 'user_id')
+    else:
+        workloads = workloads.order_by('open_tickets', never_assigned_first, 'user_id')
+
+    workloads = list(workloads)
+    if policy == 'category_affinity':
+        preferred = [w for w in workloads if ticket.category in (w.categories or [])]
+        workloads = preferred or workloads
+
+    chosen = workloads[0]
+    chosen.last_assigned_at = timezone.now()
+    chosen.save(update_fields=['last_assigned_at'])
+    return chosen.user
+
+
+def reconcile_workloads():
+    """Reset every workload counter to the assignee's actual open-ticket count; returns how many drifted"""
+    with transaction.atomic():
+        # Locked before counting: a concurrent save's delta either committed
+        # before the count (and is in it) or is applied after this write
+        workloads = list(AssigneeWorkload.objects.select_for_update().order_by('user_id'))
+        counts = dict(
+            Ticket.objects.filter(
+                assigned_to_id__in=[workload.user_id for workload in workloads], status__in=ACTIVE_STATUSES
+            ).values('assigned_to').annotate(count=Count('id')).values_list('assigned_to', 'count')
+        )
+        drifted = [workload for workload in workloads if workload.open_tickets != counts.get(workload.user_id, 0)]
+        for workload in drifted:
+            workload.open_tickets = counts.get(workload.user_id, 0)
+        AssigneeWorkload.objects.bulk_update(drifted, ['open_tickets'])
+    return len(drifted)
@@ -0,0 +1,243 @@
+"""
+Likely-duplicate detection for new tickets.
+
+Each process keeps an in-memory trigram index over the titles of open
+tickets. A lookup only scores the tickets that share the most trigrams
+with the query (blocking), so cost depends on the number of similar
+titles rather than on the number of open tickets. Scoring uses RapidFuzz.
+
+The index is maintained by a background thread in each process, so no
+request waits for it to load; until the first load finishes lookups find
+nothing. The ticket signals update the index directly in the process that
+made the change. Every ``DUPLICATE_INDEX_SYNC_SECONDS`` the thread pulls
+tickets saved elsewhere (by ``updated_at``). Deletes, including archiving,
+bump a removal generation in the cache, and any process that sees it change
+reloads the index. Queryset ``update()`` calls do not touch ``updated_at``,
+so the index is also reloaded every ``DUPLICATE_INDEX_RELOAD_SECONDS``.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+from rapidfuzz import fuzz
+
+from .models import Ticket, ACTIVE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+')
+
+REMOVAL_GENERATION_KEY = 'ticket_duplicates:removal_generation'
+
+# Re-read a little history on each sync to catch transactions that were
+# still open (and so invisible) during the previous one
+SYNC_OVERLAP = timedelta(seconds=60)
+
+# Trigrams shared by more than this fraction of open tickets are ignored
+MAX_POSTING_FRACTION = 0.05
+MIN_POSTING_CAP = 500
+
+
+def normalize(title):
+    return ' '.join(_WORD_RE.findall(title.lower()))
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_removal_generation():
+    return cache.get(REMOVAL_GENERATION_KEY, 0)
+
+
+def bump_removal_generation():
+    """Tell every process that tickets were deleted"""
+    try:
+        cache.incr(REMOVAL_GENERATION_KEY)
+    except ValueError:
+        cache.add(REMOVAL_GENERATION_KEY, 1, timeout=None)
+
+
+class DuplicateIndex:
+    """Trigram blocking index over open ticket titles"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(set)
+        self._entries = {}  # ticket id -> (normalized title, created_by id, trigrams)
+        self._loaded = False
+        self._synced_at = None
+        self._reloaded_at = 0.0
+        self._removal_generation = None
+        self._refresher_pid = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def add(self, ticket_id, title, created_by_id):
+        normalized = normalize(title)
+        grams = trigrams(normalized)
+        with self._lock:
+            self._discard(ticket_id)
+            self._entries[ticket_id] = (normalized, created_by_id, grams)
+            for gram in grams:
+                self._postings[gram].add(ticket_id)
+
+    def remove(self, ticket_id):
+        with self._lock:
+            self._discard(ticket_id)
+
+    def _discard(self, ticket_id):
+        entry = self._entries.pop(ticket_id, None)
+        if entry is None:
+            return
+        for gram in entry[2]:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(ticket_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def apply(self, ticket_id, title, status, created_by_id):
+        """Add or drop a ticket depending on whether it is still open"""
+        if status in ACTIVE_STATUSES:
+            self.add(ticket_id, title, created_by_id)
+        else:
+            self.remove(ticket_id)
+
+    def reload(self):
+        """Rebuild the index from every open ticket and swap it in"""
+        started = timezone.now()
+        generation = get_removal_generation()
+        postings, entries = defaultdict(set), {}
+        rows = Ticket.objects.filter(status__in=ACTIVE_STATUSES).values_list('id', 'title', 'created_by_id')
+        for ticket_id, title, created_by_id in rows.iterator(chunk_size=2000):
+            normalized = normalize(title)
+            grams = trigrams(normalized)
+            entries[ticket_id] = (normalized, created_by_id, grams)
+            for gram in grams:
+                postings[gram].add(ticket_id)
+
+        with self._lock:
+            self._postings, self._entries = postings, entries
+            self._loaded = True
+            # Saves committed while the rows were read come back with the next sync
+            self._synced_at = started - SYNC_OVERLAP
+            self._removal_generation = generation
+            self._reloaded_at = time.monotonic()
+
+    def sync(self):
+        """Pull changes made by other processes, reloading when tickets were removed"""
+        if (not self._loaded
+                or get_removal_generation() != self._removal_generation
+                or time.monotonic() - self._reloaded_at >= settings.DUPLICATE_INDEX_RELOAD_SECONDS):
+            self.reload()
+            return
+
+        started = timezone.now()
+        rows = Ticket.objects.filter(
+            updated_at__gte=self._synced_at
+        ).values_list('id', 'title', 'status', 'created_by_id')
+        for ticket_id, title, status, created_by_id in rows.iterator():
+            self.apply(ticket_id, title, status, created_by_id)
+        self._synced_at = started - SYNC_OVERLAP
+
+    def ensure_refresher(self):
+        # Started on first use in each process: threads do not survive a fork
+        if self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._refresher_pid != os.getpid():
+                self._refresher_pid = os.getpid()
+                threading.Thread(target=_refresh_periodically, name='duplicate-index', daemon=True).start()
+
+    def search(self, title, created_by_id=None, exclude_id=None, limit=5):
+        """Return ``(ticket_id, score)`` pairs for the most similar open tickets"""
+        normalized = normalize(title)
+        grams = trigrams(normalized)
+        if len(normalized) < 3:
+            return []
+
+        with self._lock:
+            # Very common trigrams say little about similarity but dominate
+            # the work; skip them unless nothing more selective is left
+            cap = max(MIN_POSTING_CAP, int(len(self._entries) * MAX_POSTING_FRACTION))
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            selective = [ids for ids in postings if len(ids) <= cap] or postings[:1]
+
+            overlap = Counter()
+            for ids in selective:
+                overlap.update(ids)
+            overlap.pop(exclude_id, None)
+            if created_by_id is not None:
+                overlap = Counter({
+                    ticket_id: count for ticket_id, count in overlap.items()
+                    if self._entries[ticket_id][1] == created_by_id
+                })
+
+            candidates = [
+                (ticket_id, self._entries[ticket_id][0])
+                for ticket_id, _ in overlap.most_common(settings.DUPLICATE_CANDIDATE_LIMIT)
+            ]
+
+        results = []
+        for ticket_id, candidate in candidates:
+            score = fuzz.token_set_ratio(normalized, candidate)
+            if score >= settings.DUPLICATE_SCORE_THRESHOLD:
+                results.append((ticket_id, score))
+
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:limit]
+
+
+duplicate_index = DuplicateIndex()
+
+
+def _refresh_periodically():
+    while True:
+        try:
+            duplicate_index.sync()
+        except Exception:
+            logger.exception('Could not refresh the duplicate index')
+        finally:
+            # This thread's connections would otherwise sit idle until the next sync
+            connections.close_all()
+        time.sleep(settings.DUPLICATE_INDEX_SYNC_SECONDS)
+
+
+def find_duplicates(title, user, exclude_id=None, limit=5):
+    """
+    Return likely duplicate tickets for ``title`` visible to ``user``.
+
+    Each returned ticket carries a ``duplicate_score`` attribute (0-100).
+    """
+    duplicate_index.ensure_refresher()
+
+    # Regular users may only see their own tickets
+    owner_id = None if (user.is_admin or user.is_automation_team) else user.id
+    matches = duplicate_index.search(title, created_by_id=owner_id, exclude_id=exclude_id, limit=limit)
+    if not matches:
+        return []
+
+    scores = dict(matches)
+    tickets = Ticket.objects.filter(
+        id__in=scores, status__in=ACTIVE_STATUSES
+    ).only('id', 'title', 'status', 'created_at')
+    tickets = sorted(tickets, key=lambda ticket: scores[ticket.id], reverse=True)
+    for ticket in tickets:
+        ticket.duplicate_score = round(scores[ticket.id])
+    return tickets
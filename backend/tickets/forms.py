@@ -1,6 +1,29 @@
 from django import forms
-from .models import Ticket, Comment
+from django.conf import settings
+from django.db.models import Q
+from .models import Ticket, Comment, SavedSearch
+from .saved_searches import MAX_WORD_LENGTH, search_words
 from users.models import User
+from users.directory import STAFF_ROLES, get_staff
+
+
+def set_staff_choices(field, current_id=None):
+    """Limit a user ModelChoiceField to staff, rendering choices from the staff directory
+
+    ``current_id`` (the instance's current assignee) stays selectable even if
+    they have since been deactivated or left the staff roles, so saving the
+    form does not silently unassign the ticket.
+    """
+    # The queryset is only evaluated when a submitted value is validated
+    field.queryset = User.objects.filter(role__in=STAFF_ROLES)
+    choices = [(member.id, str(member)) for member in get_staff()]
+    if current_id and current_id not in {member_id for member_id, _ in choices}:
+        field.queryset = User.objects.filter(Q(role__in=STAFF_ROLES) | Q(pk=current_id))
+        current = User.objects.filter(pk=current_id).first()
+        if current is not None:
+            choices.append((current.id, f'{current} (no longer active staff)'))
+    field.choices = [('', field.empty_label)] + choices
+    field.required = False
 
 
 class TicketForm(forms.ModelForm):
@@ -57,11 +80,7 @@ class TicketUpdateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter users to only automation team members for assignment
-        self.fields['assigned_to'].queryset = User.objects.filter(
-            role__in=['admin', 'automation_team']
-        )
-        self.fields['assigned_to'].required = False
+        set_staff_choices(self.fields['assigned_to'], self.instance.assigned_to_id)
 
 
 class TicketAssignmentForm(forms.ModelForm):
@@ -75,11 +94,7 @@ class TicketAssignmentForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter users to only automation team members
-        self.fields['assigned_to'].queryset = User.objects.filter(
-            role__in=['admin', 'automation_team']
-        )
-        self.fields['assigned_to'].required = False
+        set_staff_choices(self.fields['assigned_to'], self.instance.assigned_to_id)
 
 
 class TicketStatusForm(forms.ModelForm):
@@ -122,4 +137,47 @@ class CommentForm(forms.ModelForm):
         # Only show internal note option for admin/automation team
         if self.user and not (self.user.is_admin or self.user.is_automation_team):
             self.fields['comment_type'].widget = forms.HiddenInput()
-            self.fields['comment_type'].initial = 'public'
\ No newline at end of file
+            self.fields['comment_type'].initial = 'public'
+
+class SavedSearchForm(forms.ModelForm):
+    """Saves the ticket list's current filters; only the name is entered by the user"""
+    tags = forms.CharField(required=False)
+
+    class Meta:
+        model = SavedSearch
+        fields = ['name', 'status', 'priority', 'category', 'assigned_to', 'search', 'tags']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Name this search...'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user')
+        super().__init__(*args, **kwargs)
+        self.instance.user = self.user
+
+    def clean_tags(self):
+        return [tag.strip() for tag in self.cleaned_data['tags'].split(',') if tag.strip()]
+
+    def clean_search(self):
+        search = self.cleaned_data['search']
+        if any(len(word) > MAX_WORD_LENGTH for word in search_words(search)):
+            raise forms.ValidationError(
+                f'Saved searches cannot alert on words longer than {MAX_WORD_LENGTH} characters.'
+            )
+        return search
+
+    def clean_name(self):
+        name = self.cleaned_data['name']
+        if self.user.saved_searches.filter(name=name).exists():
+            raise forms.ValidationError('You already have a saved search with this name.')
+        return name
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Search text without a single word (only punctuation) filters nothing
+        filters = ('status', 'priority', 'category', 'assigned_to', 'tags')
+        if not (any(cleaned_data.get(name) for name in filters) or search_words(cleaned_data.get('search') or '')):
+            raise forms.ValidationError('Choose at least one filter before saving a search.')
+        if self.user.saved_searches.count() >= settings.SAVED_SEARCH_LIMIT:
+            raise forms.ValidationError(f'You can keep up to {settings.SAVED_SEARCH_LIMIT} saved searches.')
+        return cleaned_data
@@ -0,0 +1,185 @@
+"""
+Cache of ordered ticket-ID pages for ``TicketListView``.
+
+The automation team reloads the same few filter combinations all day, so the
+IDs on each page (and the total count) are cached, keyed on the normalized
+filters, the role scope and the generations of everything those filters and
+the sort order read. Rows are then loaded fresh with one ``id__in`` query, so
+only membership and order come from the cache.
+
+Generations are counters in the shared cache, one per filter value
+(``status=open``, ``priority=urgent``, ``created_by=<id>``, ...) plus ``all``
+for unfiltered lists, ``activity`` for the activity sorts and ``epoch``, which
+every list reads and bulk changes bump. ``tickets.signals``
+bumps, after commit, the counters for the old and new value of each filter
+field a save changed, and every value of a ticket that was created or deleted.
+A ticket change can only move it into, out of or within a cached list if one
+of those counters is part of the list's key, so unrelated writes leave the
+entry valid.
+
+Lists read from a replica may lag a bump by a moment; entries expire after
+TICKET_LIST_CACHE_SECONDS regardless. Hits and misses are reported on
+``/metrics`` as ``cache_hit_ratio{namespace="ticket_list"}``.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Ticket
+
+PAGE_PREFIX = 'ticket_list'
+GENERATION_PREFIX = 'ticket_list_generation'
+
+# Ticket attribute -> list filter it affects
+FILTER_FIELDS = {
+    'status': 'status',
+    'priority': 'priority',
+    'category': 'category',
+    'assigned_to_id': 'assigned_to',
+    'created_by_id': 'created_by',
+}
+ACTIVITY_SORTS = {'recently_active', 'most_comments'}
+
+VALID_VALUES = {
+    'status': {value for value, _ in Ticket.STATUS_CHOICES},
+    'priority': {value for value, _ in Ticket.PRIORITY_CHOICES},
+    'category': {value for value, _ in Ticket.CATEGORY_CHOICES},
+}
+
+
+def _generation_key(name, value=None):
+    return f'{GENERATION_PREFIX}:{name}' if value is None else f'{GENERATION_PREFIX}:{name}={value}'
+
+
+def ticket_filter_state(ticket):
+    """The filter values of a ticket, or None if some of them were not loaded"""
+    values = ticket.__dict__
+    if not all(attname in values for attname in FILTER_FIELDS):
+        return None
+    return {name: values[attname] for attname, name in FILTER_FIELDS.items()}
+
+
+def changed_generations(old_state, new_state):
+    """Generation keys to bump for a ticket going from ``old_state`` to ``new_state``
+
+    Either state may be None for a created or deleted ticket.
+    """
+    if old_state is None or new_state is None:
+        keys = {_generation_key('all')}
+        for state in (old_state, new_state):
+            if state:
+                keys.update(_generation_key(name, value) for name, value in state.items())
+        return keys
+
+    keys = set()
+    for name, value in new_state.items():
+        if old_state[name] != value:
+            keys.add(_generation_key(name, old_state[name]))
+            keys.add(_generation_key(name, value))
+    return keys
+
+
+def bump(keys):
+    """Invalidate every cached page that depends on ``keys`` once the transaction commits"""
+    keys = set(keys)
+    if not keys:
+        return
+
+    def _bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, timeout=None)
+
+    transaction.on_commit(_bump)
+
+
+def bump_activity():
+    bump([_generation_key('activity')])
+
+
+def bump_all():
+    """For bulk changes that bypass model signals"""
+    bump([_generation_key('epoch')])
+
+
+def cache_key_for(user, params):
+    """Key prefix for a list request, or None when the request is not worth caching"""
+    # Searches and tags are too varied to hit, overdue depends on the clock and
+    # the closed filter also reads the archive
+    if params.get('search') or params.get('tags') or params.get('overdue') or params.get('status') == 'closed':
+        return None
+
+    filters = {}
+    for name, valid in VALID_VALUES.items():
+        value = params.get(name)
+        if value:
+            if value not in valid:
+                return None
+            filters[name] = value
+    if params.get('assigned_to'):
+        try:
+            filters['assigned_to'] = uuid.UUID(params['assigned_to'])
+        except ValueError:
+            return None
+
+    if user.is_admin or user.is_automation_team:
+        scope = 'staff'
+    else:
+        scope = f'user:{user.id}'
+        filters['created_by'] = user.id
+
+    sort = params.get('sort') if params.get('sort') in ACTIVITY_SORTS else 'newest'
+    generation_keys = [_generation_key(name, value) for name, value in sorted(filters.items())]
+    if not generation_keys:
+        generation_keys.append(_generation_key('all'))
+    generation_keys.append(_generation_key('epoch'))
+    if sort in ACTIVITY_SORTS:
+        generation_keys.append(_generation_key('activity'))
+
+    generations = cache.get_many(generation_keys)
+    signature = repr((scope, sort, sorted(filters.items()),
+                      [generations.get(key, 0) for key in generation_keys]))
+    return f'{PAGE_PREFIX}:{hashlib.sha1(signature.encode()).hexdigest()}'
+
+
+class CachedTicketPages:
+    """Ordered ticket queryset whose count and page IDs are served from the cache
+
+    Meant to be handed to ``Paginator``; each page is hydrated with one
+    ``id__in`` query.
+    """
+    ordered = True
+
+    def __init__(self, queryset, key):
+        self.queryset = queryset
+        self.key = key
+
+    def count(self):
+        count = cache.get(f'{self.key}:count')
+        if count is None:
+            count = self.queryset.count()
+            cache.set(f'{self.key}:count', count, settings.TICKET_LIST_CACHE_SECONDS)
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        page_key = f'{self.key}:{index.start}:{index.stop}'
+        ids = cache.get(page_key)
+        if ids is None:
+            ids = list(self.queryset.values_list('pk', flat=True)[index])
+            cache.set(page_key, ids, settings.TICKET_LIST_CACHE_SECONDS)
+
+        tickets = self.queryset.in_bulk(ids)
+        # A ticket deleted since the page was cached is simply left out
+        return [tickets[pk] for pk in ids if pk in tickets]
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ticketing_system.db_pool.pool import ConnectionPool, PoolTimeout
+
+
+class Command(BaseCommand):
+    help = ('Compare connection acquisition latency when opening a connection per request '
+            '(CONN_MAX_AGE=0) with checking one out of the connection pool')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--threads', nargs='+', type=int, default=[1, 8, 32, 64])
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per thread count')
+        parser.add_argument('--hold-ms', type=float, default=5.0,
+                            help='Simulated request time a connection is held for after a SELECT 1')
+        parser.add_argument('--max-size', type=int, default=10, help='Pool size')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Pool checkout timeout')
+
+    def handle(self, *args, **options):
+        wrapper = connections[options['database']]
+        params = wrapper.get_connection_params()
+        open_connection = getattr(wrapper, 'connect_direct', wrapper.get_new_connection)
+
+        pool_options = {'max_size': options['max_size'], 'timeout': options['timeout']}
+        if wrapper.vendor == 'postgresql':
+            from ticketing_system.db_pool.base import reset_connection
+            pool_options['reset'] = reset_connection
+
+        self.stdout.write(f"{options['database']} ({wrapper.vendor}), hold {options['hold_ms']:g}ms, "
+                          f"pool max_size {options['max_size']}, {options['duration']:g}s per level")
+        self.stdout.write(f"{'mode':<8}{'threads':>8}{'checkouts/s':>13}{'p50 ms':>9}{'p95 ms':>9}"
+                          f"{'p99 ms':>9}{'timeouts':>10}")
+
+        for threads in options['threads']:
+            direct = Direct(lambda: open_connection(params))
+            self.report('direct', threads, run(direct, threads, options))
+
+            pool = ConnectionPool('benchmark', **pool_options)
+            self.report('pooled', threads, run(Pooled(pool, lambda: open_connection(params)), threads, options))
+            stats = pool.stats()
+            pool.close_idle()
+            self.stdout.write(f"{'':<8}pool opened {stats['connections_opened']} connections, "
+                              f"max wait {stats['wait_seconds_max'] * 1000:.1f}ms")
+
+    def report(self, mode, threads, result):
+        self.stdout.write(
+            f"{mode:<8}{threads:>8}{result['throughput']:>13.1f}{result['p50']:>9.2f}"
+            f"{result['p95']:>9.2f}{result['p99']:>9.2f}{result['timeouts']:>10}"
+        )
+
+
+class Direct:
+    """Open and close a connection for every checkout"""
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def getconn(self):
+        return self.connect()
+
+    def putconn(self, connection):
+        connection.close()
+
+
+class Pooled:
+    def __init__(self, pool, connect):
+        self.pool = pool
+        self.connect = connect
+
+    def getconn(self):
+        return self.pool.getconn(self.connect)
+
+    def putconn(self, connection):
+        self.pool.putconn(connection)
+
+
+def run(source, threads, options):
+    latencies = []
+    timeouts = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + options['duration']
+    hold = options['hold_ms'] / 1000
+
+    def worker():
+        nonlocal timeouts
+        local = []
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                connection = source.getconn()
+            except PoolTimeout:
+                with lock:
+                    timeouts += 1
+                continue
+            local.append((time.monotonic() - started) * 1000)
+            try:
+                cursor = connection.cursor()
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+                cursor.close()
+                time.sleep(hold)
+            finally:
+                source.putconn(connection)
+        with lock:
+            latencies.extend(local)
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'timeouts': timeouts,
+    }
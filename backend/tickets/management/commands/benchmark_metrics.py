@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from users.models import User
+
+from ticketing_system.metrics import record_query
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of metrics collection (middleware, query and cache recording)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Email of an existing user to make requests as')
+        parser.add_argument('--paths', nargs='+',
+                            default=['/notifications/unread/', '/tickets/my/', '/'])
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path per round')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Rounds alternating metrics on and off, to even out noise')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        timings = {True: {path: [] for path in options['paths']},
+                   False: {path: [] for path in options['paths']}}
+        for _ in range(options['rounds']):
+            for enabled in (False, True):
+                for path, seconds in self.run_round(user, enabled, options).items():
+                    timings[enabled][path].append(seconds)
+
+        self.stdout.write(f"{options['rounds']} rounds x {options['requests']} requests per path")
+        self.stdout.write(f"{'path':<28}{'off ms':>9}{'on ms':>9}{'overhead':>10}")
+        for path in options['paths']:
+            # Best round of each mode: the least disturbed by unrelated load
+            off = min(timings[False][path]) / options['requests'] * 1000
+            on = min(timings[True][path]) / options['requests'] * 1000
+            self.stdout.write(f'{path:<28}{off:>9.3f}{on:>9.3f}{(on - off) / off * 100:>9.1f}%')
+
+    def run_round(self, user, enabled, options):
+        with override_settings(METRICS_ENABLED=enabled, ALLOWED_HOSTS=['*']):
+            # Connections pick up the query recorder when they are opened
+            connections.close_all()
+            for connection in connections.all():
+                if record_query in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(record_query)
+            client = Client()
+            client.force_login(user)
+            for path in options['paths']:
+                client.get(path)
+
+            results = {}
+            for path in options['paths']:
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    client.get(path)
+                results[path] = time.perf_counter() - started
+        return results
@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from tickets.models import Ticket
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Report p50/p95/p99 latency of /tickets/typeahead/ for prefixes and fragments '
+            'of existing ticket titles')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Email of an existing user to make requests as')
+        parser.add_argument('--queries', type=int, default=500, help='Requests per query kind')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        rng = random.Random(options['seed'])
+        titles = self.sample_titles(rng, options['queries'])
+        if not titles:
+            raise CommandError('No tickets to sample titles from')
+
+        queries = {'prefix': [], 'fragment': []}
+        for title in titles:
+            queries['prefix'].append(title[:rng.randint(2, 6)])
+            words = [word for word in title.split() if len(word) >= 3]
+            if words:
+                word = rng.choice(words)
+                start = rng.randrange(len(word) - 2)
+                queries['fragment'].append(word[start:start + rng.randint(3, 6)])
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            client = Client()
+            client.force_login(user)
+            client.get('/tickets/typeahead/', {'q': 'warm'})
+
+            self.stdout.write(f"{len(titles)} sampled titles, {Ticket.objects.count()} tickets")
+            self.stdout.write(f"{'kind':<10}{'requests':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+            for kind, values in queries.items():
+                timings = []
+                for query in values:
+                    started = time.perf_counter()
+                    client.get('/tickets/typeahead/', {'q': query})
+                    timings.append((time.perf_counter() - started) * 1000)
+                if len(timings) < 2:
+                    continue
+                cuts = statistics.quantiles(timings, n=100)
+                self.stdout.write(f'{kind:<10}{len(timings):>10}{cuts[49]:>9.2f}{cuts[94]:>9.2f}'
+                                  f'{cuts[98]:>9.2f}{max(timings):>9.2f}')
+
+    def sample_titles(self, rng, count):
+        """Titles of tickets after random UUIDs, without ORDER BY random() over the table"""
+        titles = []
+        for _ in range(count):
+            pivot = uuid.UUID(int=rng.getrandbits(128))
+            title = (
+                Ticket.objects.filter(pk__gte=pivot).order_by('pk').values_list('title', flat=True).first()
+                or Ticket.objects.order_by('pk').values_list('title', flat=True).first()
+            )
+            if title:
+                titles.append(title)
+        return titles
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tickets.tasks import rebuild_ticket_vectors
+
+
+class Command(BaseCommand):
+    help = ('Compute the similarity vector of every ticket, including those saved before vectors '
+            'existed, then signal every process to rebuild its similarity matrix')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--queue', action='store_true',
+                            help='Send the rebuild to the bulk Celery queue instead of running it here')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            result = rebuild_ticket_vectors.delay(chunk_size=options['chunk_size'])
+            self.stdout.write(f'Queued rebuild_ticket_vectors as task {result.id}')
+            return
+        self.stdout.write(self.style.SUCCESS(rebuild_ticket_vectors(chunk_size=options['chunk_size'])))
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from tickets import list_cache
+from tickets.models import Comment, Ticket, TicketStatusHistory
+
+
+class Command(BaseCommand):
+    help = ('Recompute comment_count, last_activity_at and last_comment_by on tickets '
+            'from their comments and status history, one chunk per transaction')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between chunks to limit load on the primary')
+
+    def handle(self, *args, **options):
+        comments = Comment.objects.filter(ticket=OuterRef('pk'))
+        comment_count = Subquery(
+            comments.order_by().values('ticket').annotate(total=Count('id')).values('total')
+        )
+        last_comment = comments.order_by('-created_at')
+        last_status_change = Subquery(
+            TicketStatusHistory.objects.filter(ticket=OuterRef('pk'))
+            .order_by().values('ticket').annotate(latest=Max('changed_at')).values('latest')
+        )
+
+        started = time.monotonic()
+        repaired = 0
+        last_pk = None
+        while True:
+            # Keyset pagination: each chunk is a short transaction on the primary
+            chunk = Ticket.objects.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            ids = list(chunk.values_list('pk', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+
+            with transaction.atomic():
+                Ticket.objects.filter(pk__in=ids).update(
+                    comment_count=Coalesce(comment_count, 0),
+                    last_comment_by=Subquery(last_comment.values('author')[:1]),
+                    last_activity_at=Greatest(
+                        F('created_at'),
+                        Coalesce(Subquery(last_comment.values('created_at')[:1]), F('created_at')),
+                        Coalesce(last_status_change, F('created_at')),
+                    )
+                )
+
+                list_cache.bump_activity()
+
+            repaired += len(ids)
+            last_pk = ids[-1]
+            self.stdout.write(f'{repaired} tickets repaired')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired {repaired} tickets in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,33 @@
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Start a Celery worker for one queue with the concurrency and prefetch '
+            'configured in TASK_QUEUE_WORKERS; extra arguments go to celery')
+
+    def add_arguments(self, parser):
+        parser.add_argument('queue', choices=sorted(settings.TASK_QUEUE_WORKERS))
+        parser.add_argument('celery_args', nargs='*', help='Passed through, e.g. -- --loglevel=debug')
+
+    def handle(self, *args, **options):
+        queue = options['queue']
+        config = settings.TASK_QUEUE_WORKERS[queue]
+        command = [
+            sys.executable, '-m', 'celery', '-A', 'ticketing_system', 'worker',
+            '--queues', queue,
+            '--hostname', f'{queue}@%h',
+            '--concurrency', str(config['concurrency']),
+            '--prefetch-multiplier', str(config['prefetch_multiplier']),
+            '--loglevel', 'info',
+            *options['celery_args'],
+        ]
+        self.stdout.write(' '.join(command))
+        self.stdout.flush()
+        try:
+            os.execv(sys.executable, command)
+        except OSError as exc:
+            raise CommandError(f'Could not start celery: {exc}')
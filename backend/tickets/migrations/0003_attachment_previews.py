@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:02
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0002_alter_ticket_category"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="attachment_text",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name="AttachmentPreview",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64, unique=True)),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("image", "Image"),
+                            ("pdf", "PDF"),
+                            ("spreadsheet", "Spreadsheet"),
+                            ("document", "Document"),
+                            ("presentation", "Presentation"),
+                            ("text", "Text"),
+                            ("other", "Other"),
+                        ],
+                        default="other",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("ready", "Ready"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("thumbnail", models.CharField(blank=True, max_length=255)),
+                ("extracted_text", models.TextField(blank=True)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "tickets",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="attachment_previews",
+                        to="tickets.ticket",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "attachment_previews",
+                "ordering": ["file_name"],
+            },
+        ),
+    ]
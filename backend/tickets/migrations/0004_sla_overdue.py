@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0003_attachment_previews"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("value", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "task_watermarks",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status__in", ["open", "in_progress"])),
+                fields=["due_date"],
+                name="tickets_active_due_date_idx",
+            ),
+        ),
+    ]
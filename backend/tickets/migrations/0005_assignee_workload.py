@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+        ("tickets", "0004_sla_overdue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AssigneeWorkload",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="workload",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("open_tickets", models.PositiveIntegerField(default=0)),
+                ("last_assigned_at", models.DateTimeField(blank=True, null=True)),
+                ("categories", models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                "db_table": "assignee_workloads",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0005_assignee_workload"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["updated_at"], name="tickets_updated_75edd1_idx"
+            ),
+        ),
+    ]
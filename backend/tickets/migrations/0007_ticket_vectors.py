@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0006_ticket_updated_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketVector",
+            fields=[
+                (
+                    "ticket",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="vector",
+                        serialize=False,
+                        to="tickets.ticket",
+                    ),
+                ),
+                ("indices", models.BinaryField()),
+                ("weights", models.BinaryField()),
+                ("is_resolved", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "ticket_vectors",
+                "indexes": [
+                    models.Index(
+                        fields=["is_resolved"], name="ticket_vect_is_reso_993d23_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Comment counts are filled in by `manage.py repair_ticket_activity`
+    Ticket = apps.get_model("tickets", "Ticket")
+    Ticket.objects.update(last_activity_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tickets", "0007_ticket_vectors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="last_activity_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="ticket",
+            name="last_comment_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["-last_activity_at"], name="tickets_last_ac_71c164_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["-comment_count", "-last_activity_at"],
+                name="tickets_comment_ff5a12_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,203 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tickets", "0008_ticket_activity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("description", models.TextField()),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("automation", "Automation Request"),
+                            ("bug_report", "Bug Report"),
+                            ("feature_request", "Feature Request"),
+                            ("maintenance", "Maintenance"),
+                            ("wfm_requests", "WFM requests"),
+                            ("other", "Other"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("low", "Low"),
+                            ("medium", "Medium"),
+                            ("high", "High"),
+                            ("urgent", "Urgent"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("open", "Open"),
+                            ("in_progress", "In Progress"),
+                            ("delivered", "Delivered"),
+                            ("closed", "Closed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("due_date", models.DateTimeField(blank=True, null=True)),
+                ("closed_at", models.DateTimeField(blank=True, null=True)),
+                ("comment_count", models.PositiveIntegerField(default=0)),
+                ("last_activity_at", models.DateTimeField()),
+                ("attachments", models.JSONField(blank=True, default=list)),
+                ("tags", models.JSONField(blank=True, default=list)),
+                ("attachment_text", models.TextField(blank=True, editable=False)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "assigned_to",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "last_comment_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "archived_tickets",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedStatusHistory",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("old_status", models.CharField(blank=True, max_length=20)),
+                ("new_status", models.CharField(max_length=20)),
+                ("changed_at", models.DateTimeField()),
+                ("notes", models.TextField(blank=True)),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_history",
+                        to="tickets.archivedticket",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "archived_ticket_status_history",
+                "ordering": ["-changed_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedComment",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("content", models.TextField()),
+                (
+                    "comment_type",
+                    models.CharField(
+                        choices=[
+                            ("public", "Public Comment"),
+                            ("internal", "Internal Note"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("attachments", models.JSONField(blank=True, default=list)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comments",
+                        to="tickets.archivedticket",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "archived_comments",
+                "ordering": ["created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="archivedticket",
+            index=models.Index(
+                fields=["created_by"], name="archived_ti_created_e48029_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedticket",
+            index=models.Index(
+                fields=["assigned_to"], name="archived_ti_assigne_3c11f9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedticket",
+            index=models.Index(
+                fields=["created_at"], name="archived_ti_created_b82448_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Substring search (icontains) in the admin's performance mode compiles to
+# UPPER(column::text) LIKE UPPER('%term%'), which these trigram indexes serve.
+# PostgreSQL only; other databases skip them.
+INDEXES = [
+    ("tickets_title_trgm_idx", "tickets", "title"),
+    ("comments_content_trgm_idx", "comments", "content"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0009_ticket_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Prefix search (istartswith) compiles to UPPER(title::text) LIKE UPPER('term%'),
+# which this index serves as a range scan; the trigram index from 0010 only
+# serves it by scanning every matching trigram posting. PostgreSQL only.
+INDEX_NAME = "tickets_title_prefix_idx"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON tickets (UPPER(title::text) text_pattern_ops)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0011_saved_searches"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
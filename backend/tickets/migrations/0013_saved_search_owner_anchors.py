@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Searches of users who only see their own tickets are anchored on the owner
+# (tickets.saved_searches.anchor_term); re-anchor the ones saved before that.
+STAFF_ROLES = ["admin", "automation_team"]
+
+
+def anchor_on_owner(apps, schema_editor):
+    SavedSearch = apps.get_model("tickets", "SavedSearch")
+    searches = SavedSearch.objects.exclude(user__role__in=STAFF_ROLES).only("id", "user_id")
+    for saved_search in searches.iterator():
+        SavedSearch.objects.filter(id=saved_search.id).update(anchor=f"created_by={saved_search.user_id}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0012_title_prefix_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(anchor_on_owner, migrations.RunPython.noop),
+    ]
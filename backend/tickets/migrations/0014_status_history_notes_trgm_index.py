@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# The status history admin's performance-mode search matches notes with
+# icontains (see 0010). PostgreSQL only; other databases skip it.
+INDEX_NAME = "ticket_status_history_notes_trgm_idx"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON ticket_status_history USING gin (UPPER(notes::text) gin_trgm_ops)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0013_saved_search_owner_anchors"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0014_status_history_notes_trgm_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="sla_breach_reported_for",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0015_sla_breach_reported_for"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticketvector",
+            name="ticket",
+            field=models.OneToOneField(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                primary_key=True,
+                related_name="vector",
+                serialize=False,
+                to="tickets.ticket",
+            ),
+        ),
+    ]
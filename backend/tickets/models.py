@@ -1,10 +1,35 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.db.models.functions import Now
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
+# Statuses for which a due date still applies
+ACTIVE_STATUSES = ['open', 'in_progress']
+
+# Ticket columns maintained with F() updates rather than by saving the instance
+ACTIVITY_FIELDS = {'comment_count', 'last_activity_at', 'last_comment_by'}
+# Ticket columns only the SLA breach scanner writes (with queryset updates)
+SCANNER_FIELDS = {'sla_breach_reported_for'}
+
+
+class TicketQuerySet(models.QuerySet):
+    def with_overdue(self):
+        """Annotate each ticket with an SQL-evaluated ``overdue`` flag"""
+        return self.annotate(
+            overdue=models.ExpressionWrapper(
+                # Without the null check a ticket with no due date is NULL, not False
+                models.Q(due_date__isnull=False, due_date__lt=Now(), status__in=ACTIVE_STATUSES),
+                output_field=models.BooleanField()
+            )
+        )
+
+    def overdue(self):
+        """Only tickets past their due date that are still being worked on"""
+        return self.filter(due_date__lt=Now(), status__in=ACTIVE_STATUSES)
+
 
 class Ticket(models.Model):
     STATUS_CHOICES = [
@@ -44,10 +69,20 @@ class Ticket(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # The due date scan_sla_breaches last escalated, so each breach is reported once
+    sla_breach_reported_for = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Denormalized activity, kept current by tickets.signals (repair_ticket_activity rebuilds it)
+    comment_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    last_comment_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     # Metadata
     attachments = models.JSONField(default=list, blank=True)  # Store file paths
     tags = models.JSONField(default=list, blank=True)  # Store tag strings
+    attachment_text = models.TextField(blank=True, editable=False)  # Extracted attachment text for search
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
         db_table = 'tickets'
@@ -59,6 +94,16 @@ class Ticket(models.Model):
             models.Index(fields=['created_by']),
             models.Index(fields=['assigned_to']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['updated_at']),
+            # "Recently active" and "most discussed" sorting on the ticket list
+            models.Index(fields=['-last_activity_at']),
+            models.Index(fields=['-comment_count', '-last_activity_at']),
+            # Partial index used by the SLA breach scanner and overdue filters
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='tickets_active_due_date_idx'
+            ),
         ]
 
     def __str__(self):
@@ -70,12 +115,24 @@ class Ticket(models.Model):
             self.closed_at = timezone.now()
         elif self.status != 'closed' and self.closed_at:
             self.closed_at = None
+
+        # A full save of an instance loaded before a comment was added (or a
+        # breach was reported) must not roll those columns back
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            skipped = ACTIVITY_FIELDS | SCANNER_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped and field.attname not in skipped
+            ]
         super().save(*args, **kwargs)
 
     @property
     def is_overdue(self):
         """Check if ticket is overdue"""
-        if self.due_date and self.status not in ['closed', 'delivered']:
+        # Prefer the value computed by TicketQuerySet.with_overdue()
+        if 'overdue' in self.__dict__:
+            return self.overdue
+        if self.due_date and self.status in ACTIVE_STATUSES:
             return timezone.now() > self.due_date
         return False
 
@@ -112,6 +169,7 @@ class Ticket(models.Model):
         old_status = self.status
         if old_status != new_status:
             self.status = new_status
+            self._changed_by_id = changed_by.id if changed_by else None
             self.save()
             TicketStatusHistory.objects.create(
                 ticket=self,
@@ -168,4 +226,244 @@ class TicketStatusHistory(models.Model):
         ordering = ['-changed_at']
 
     def __str__(self):
-        return f"{self.ticket.title}: {self.old_status} → {self.new_status}"
\ No newline at end of file
+        return f"{self.ticket.title}: {self.old_status} → {self.new_status}"
+
+
+class AttachmentPreview(models.Model):
+    """Thumbnail and extracted text for an attachment, keyed by content hash"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    KIND_CHOICES = [
+        ('image', 'Image'),
+        ('pdf', 'PDF'),
+        ('spreadsheet', 'Spreadsheet'),
+        ('document', 'Document'),
+        ('presentation', 'Presentation'),
+        ('text', 'Text'),
+        ('other', 'Other'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+
+    thumbnail = models.CharField(max_length=255, blank=True)  # Storage path of the PNG thumbnail
+    extracted_text = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+
+    tickets = models.ManyToManyField(Ticket, related_name='attachment_previews', blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'attachment_previews'
+        ordering = ['file_name']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()})"
+
+    @property
+    def thumbnail_url(self):
+        """Public URL of the thumbnail, if one was generated"""
+        if not self.thumbnail:
+            return ''
+        from django.core.files.storage import default_storage
+        return default_storage.url(self.thumbnail)
+
+    @property
+    def snippet(self):
+        """Short excerpt of the extracted text for display"""
+        return self.extracted_text[:300]
+
+
+class TaskWatermark(models.Model):
+    """Progress marker for periodic jobs that must process each item once"""
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'task_watermarks'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class AssigneeWorkload(models.Model):
+    """Open-ticket counter per assignee, maintained by tickets.signals"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='workload')
+    open_tickets = models.PositiveIntegerField(default=0)
+    last_assigned_at = models.DateTimeField(null=True, blank=True)
+    categories = models.JSONField(default=list, blank=True)  # Preferred categories for affinity routing
+
+    class Meta:
+        db_table = 'assignee_workloads'
+
+    def __str__(self):
+        return f"{self.user}: {self.open_tickets} open"
+
+
+class TicketVector(models.Model):
+    """Hashed term-frequency vector of a ticket, used for similarity search
+
+    Archived tickets keep their vector, so the key has no database constraint;
+    ``tickets.signals`` drops the vector when a ticket is deleted outright.
+    """
+    ticket = models.OneToOneField(Ticket, on_delete=models.DO_NOTHING, db_constraint=False,
+                                  primary_key=True, related_name='vector')
+    indices = models.BinaryField()  # int32 feature indices, sorted
+    weights = models.BinaryField()  # float32 log-scaled term frequencies
+    is_resolved = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ticket_vectors'
+        indexes = [
+            models.Index(fields=['is_resolved']),
+        ]
+
+    def __str__(self):
+        return f"Vector for {self.ticket_id}"
+
+
+class ArchivedTicket(models.Model):
+    """Long-closed ticket moved out of the hot tables by tickets.archive"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    category = models.CharField(max_length=20, choices=Ticket.CATEGORY_CHOICES)
+    priority = models.CharField(max_length=10, choices=Ticket.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    comment_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField()
+    last_comment_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    attachments = models.JSONField(default=list, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    attachment_text = models.TextField(blank=True, editable=False)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+    is_overdue = False
+
+    class Meta:
+        db_table = 'archived_tickets'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by']),
+            models.Index(fields=['assigned_to']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} (Archived)"
+
+    # Same rules as live tickets; archived tickets are never editable
+    resolution_time = Ticket.resolution_time
+    can_be_viewed_by = Ticket.can_be_viewed_by
+
+    def can_be_edited_by(self, user):
+        return False
+
+
+class ArchivedComment(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    content = models.TextField()
+    comment_type = models.CharField(max_length=10, choices=Comment.COMMENT_TYPE_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    attachments = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        db_table = 'archived_comments'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Comment by {self.author} on {self.ticket.title}"
+
+
+class ArchivedStatusHistory(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='status_history')
+    old_status = models.CharField(max_length=20, blank=True)
+    new_status = models.CharField(max_length=20)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    changed_at = models.DateTimeField()
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'archived_ticket_status_history'
+        ordering = ['-changed_at']
+
+    def __str__(self):
+        return f"{self.ticket.title}: {self.old_status} → {self.new_status}"
+
+
+class SavedSearch(models.Model):
+    """Ticket list filters a user saved; tickets.saved_searches alerts them on new matches"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100)
+
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES, blank=True)
+    priority = models.CharField(max_length=10, choices=Ticket.PRIORITY_CHOICES, blank=True)
+    category = models.CharField(max_length=20, choices=Ticket.CATEGORY_CHOICES, blank=True)
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    search = models.CharField(max_length=200, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+
+    alerts_enabled = models.BooleanField(default=True)
+    # The one term every matching ticket has; the percolator's inverted index
+    anchor = models.CharField(max_length=100, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'saved_searches'
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='saved_search_unique_name'),
+        ]
+        indexes = [
+            models.Index(fields=['anchor']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+
+    def save(self, *args, **kwargs):
+        from .saved_searches import anchor_term
+        self.anchor = anchor_term(self)
+        super().save(*args, **kwargs)
+
+    @property
+    def query_string(self):
+        """Ticket list query string that applies this search"""
+        from django.utils.http import urlencode
+        params = {
+            'status': self.status,
+            'priority': self.priority,
+            'category': self.category,
+            'assigned_to': self.assigned_to_id or '',
+            'search': self.search,
+            'tags': ','.join(self.tags),
+        }
+        return urlencode({key: value for key, value in params.items() if value})
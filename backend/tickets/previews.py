@@ -0,0 +1,125 @@
+"""
+Attachment preview generation: thumbnails and text extraction.
+
+These helpers run inside the Celery ``attachments`` worker, never in a
+request. Results are stored per content hash so that the same file attached
+to several tickets is only processed once.
+"""
+
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tif', '.tiff'}
+PDF_EXTENSIONS = {'.pdf'}
+SPREADSHEET_EXTENSIONS = {'.xlsx', '.xlsm'}
+DOCUMENT_EXTENSIONS = {'.docx'}
+PRESENTATION_EXTENSIONS = {'.pptx'}
+TEXT_EXTENSIONS = {'.txt', '.csv', '.log', '.md', '.json'}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_kind(path):
+    """Return the preview kind for a file path based on its extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in PDF_EXTENSIONS:
+        return 'pdf'
+    if ext in SPREADSHEET_EXTENSIONS:
+        return 'spreadsheet'
+    if ext in DOCUMENT_EXTENSIONS:
+        return 'document'
+    if ext in PRESENTATION_EXTENSIONS:
+        return 'presentation'
+    if ext in TEXT_EXTENSIONS:
+        return 'text'
+    return 'other'
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a stored file, read in chunks"""
+    digest = hashlib.sha256()
+    with default_storage.open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generate_thumbnail(path, content_hash):
+    """Create a PNG thumbnail for an image and return its storage path"""
+    from PIL import Image
+
+    with default_storage.open(path, 'rb') as fh:
+        image = Image.open(fh)
+        image.thumbnail(settings.ATTACHMENT_THUMBNAIL_SIZE)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+
+    thumbnail_path = f'previews/{content_hash[:2]}/{content_hash}.png'
+    if default_storage.exists(thumbnail_path):
+        default_storage.delete(thumbnail_path)
+    return default_storage.save(thumbnail_path, ContentFile(buffer.getvalue()))
+
+
+def extract_text(path, kind):
+    """Extract plain text from a stored document, truncated to the configured limit"""
+    limit = settings.ATTACHMENT_TEXT_MAX_CHARS
+
+    with default_storage.open(path, 'rb') as fh:
+        if kind == 'pdf':
+            from pdfminer.high_level import extract_text as pdf_extract_text
+            text = pdf_extract_text(fh, maxpages=settings.ATTACHMENT_PDF_MAX_PAGES)
+        elif kind == 'spreadsheet':
+            text = _extract_spreadsheet_text(fh, limit)
+        elif kind == 'document':
+            import mammoth
+            text = mammoth.extract_raw_text(fh).value
+        elif kind == 'presentation':
+            text = _extract_presentation_text(fh)
+        elif kind == 'text':
+            text = fh.read(limit * 4).decode('utf-8', errors='replace')
+        else:
+            text = ''
+
+    return ' '.join(text.split())[:limit]
+
+
+def _extract_spreadsheet_text(fh, limit):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fh, read_only=True, data_only=True)
+    parts = []
+    size = 0
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                cells = [str(value) for value in row if value is not None]
+                if not cells:
+                    continue
+                line = ' '.join(cells)
+                parts.append(line)
+                size += len(line)
+                if size >= limit:
+                    return '\n'.join(parts)
+    finally:
+        workbook.close()
+    return '\n'.join(parts)
+
+
+def _extract_presentation_text(fh):
+    from pptx import Presentation
+
+    parts = []
+    for slide in Presentation(fh).slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                parts.append(shape.text_frame.text)
+    return '\n'.join(parts)
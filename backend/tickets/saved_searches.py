@@ -0,0 +1,130 @@
+"""
+Percolator for saved ticket searches.
+
+Checking every saved search against each changed ticket does not scale, so
+each SavedSearch keeps one ``anchor`` term that every ticket it matches must
+have. Searches of non-staff owners, who only see their own tickets, are
+anchored on the owner. Otherwise the anchor is the most selective predicate,
+in order the longest search word, a tag, the assignee, the priority, the
+category or the status. The terms of a
+changed ticket (its field values, tags and words) find the candidate searches
+with one indexed ``anchor IN (...)`` lookup, and only those are checked in
+full, so the cost depends on the ticket rather than on how many searches exist.
+
+Search text matches when every one of its words appears in the ticket's title
+or description; whole words rather than the list's substring match, so that
+the text can be indexed. Owners are alerted when a ticket they can see starts
+matching, on creation or when an edit makes it match.
+"""
+
+import re
+
+from .models import SavedSearch
+
+# Ticket attributes the predicates read; tickets.signals snapshots them on load
+PERCOLATED_FIELDS = ('status', 'priority', 'category', 'assigned_to_id', 'created_by_id',
+                     'title', 'description', 'tags')
+
+WORD_RE = re.compile(r'\w+')
+MAX_WORD_LENGTH = 50
+
+
+def words(text):
+    """Indexed words of ticket text; longer ones are left out"""
+    return {word for word in WORD_RE.findall(text.lower()) if len(word) <= MAX_WORD_LENGTH}
+
+
+def search_words(text):
+    """Words of a search, long ones included so they match nothing rather than everything"""
+    return set(WORD_RE.findall(text.lower()))
+
+
+def sees_all_tickets(user):
+    return user.is_admin or user.is_automation_team
+
+
+def _term(name, value):
+    return f'{name}={value}'[:100]
+
+
+def snapshot(ticket):
+    """Raw predicate fields of a ticket, or None if some of them were not loaded"""
+    values = ticket.__dict__
+    if not all(attname in values for attname in PERCOLATED_FIELDS):
+        return None
+    snapshot = {attname: values[attname] for attname in PERCOLATED_FIELDS}
+    snapshot['tags'] = list(snapshot['tags'] or [])
+    return snapshot
+
+
+def ticket_state(values):
+    """JSON-serializable form of a snapshot, as matched against saved searches"""
+    return {
+        'status': values['status'],
+        'priority': values['priority'],
+        'category': values['category'],
+        'assigned_to': str(values['assigned_to_id'] or ''),
+        'created_by': str(values['created_by_id'] or ''),
+        'tags': sorted(set(values['tags'])),
+        'words': sorted(words(f"{values['title']} {values['description']}")),
+    }
+
+
+def ticket_terms(state):
+    terms = {_term(name, state[name]) for name in ('status', 'priority', 'category')}
+    if state['assigned_to']:
+        terms.add(_term('assigned_to', state['assigned_to']))
+    if state['created_by']:
+        terms.add(_term('created_by', state['created_by']))
+    terms.update(_term('tag', tag) for tag in state['tags'])
+    terms.update(_term('word', word) for word in state['words'])
+    return terms
+
+
+def anchor_term(saved_search):
+    if not sees_all_tickets(saved_search.user):
+        return _term('created_by', saved_search.user_id)
+    text_words = search_words(saved_search.search)
+    if text_words:
+        return _term('word', max(sorted(text_words), key=len))
+    if saved_search.tags:
+        return _term('tag', saved_search.tags[0])
+    if saved_search.assigned_to_id:
+        return _term('assigned_to', saved_search.assigned_to_id)
+    for name in ('priority', 'category', 'status'):
+        if getattr(saved_search, name):
+            return _term(name, getattr(saved_search, name))
+    return ''
+
+
+def matches(saved_search, state):
+    user = saved_search.user
+    if not sees_all_tickets(user) and state['created_by'] != str(user.id):
+        return False
+    for name in ('status', 'priority', 'category'):
+        value = getattr(saved_search, name)
+        if value and state[name] != value:
+            return False
+    if saved_search.assigned_to_id and state['assigned_to'] != str(saved_search.assigned_to_id):
+        return False
+    if not set(saved_search.tags) <= set(state['tags']):
+        return False
+    return search_words(saved_search.search) <= set(state['words'])
+
+
+def reanchor(user):
+    """Recompute the anchors of a user's searches after their role changed"""
+    for saved_search in user.saved_searches.all():
+        saved_search.user = user
+        saved_search.save(update_fields=['anchor'])
+
+
+def percolate(state, previous=None):
+    """Saved searches that match ``state`` but did not match ``previous``"""
+    candidates = SavedSearch.objects.filter(
+        anchor__in=ticket_terms(state), alerts_enabled=True, user__is_active=True
+    ).select_related('user')
+    return [
+        saved_search for saved_search in candidates
+        if matches(saved_search, state) and not (previous and matches(saved_search, previous))
+    ]
@@ -0,0 +1,222 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from . import list_cache, saved_searches
+from .models import Ticket, Comment, TicketStatusHistory, AssigneeWorkload, ACTIVE_STATUSES
+
+
+def _workload_owner(assigned_to_id, status):
+    """Return the user whose open-ticket counter a ticket contributes to"""
+    if assigned_to_id and status in ACTIVE_STATUSES:
+        return assigned_to_id
+    return None
+
+
+def _adjust_workload(user_id, delta):
+    AssigneeWorkload.objects.filter(user_id=user_id).update(open_tickets=F('open_tickets') + delta)
+
+
+@receiver(post_init, sender=Ticket)
+def remember_workload_owner(sender, instance, **kwargs):
+    """Snapshot the counted assignee so post_save can compute the delta"""
+    values = instance.__dict__
+    if 'assigned_to_id' in values and 'status' in values:
+        instance._workload_owner = _workload_owner(values['assigned_to_id'], values['status'])
+
+
+@receiver(post_save, sender=Ticket)
+def update_workload_counters(sender, instance, created, **kwargs):
+    """Keep AssigneeWorkload.open_tickets in step with assignment and status changes"""
+    new_owner = _workload_owner(instance.assigned_to_id, instance.status)
+    if created:
+        old_owner = None
+    elif hasattr(instance, '_workload_owner'):
+        old_owner = instance._workload_owner
+    else:
+        # Instance was loaded with deferred fields; counters cannot be diffed
+        instance._workload_owner = new_owner
+        return
+
+    if old_owner != new_owner:
+        if old_owner:
+            _adjust_workload(old_owner, -1)
+        if new_owner:
+            _adjust_workload(new_owner, 1)
+    instance._workload_owner = new_owner
+
+
+@receiver(post_delete, sender=Ticket)
+def release_workload(sender, instance, **kwargs):
+    owner = getattr(instance, '_workload_owner', None)
+    if owner:
+        _adjust_workload(owner, -1)
+
+
+@receiver(post_init, sender=Ticket)
+def remember_list_filters(sender, instance, **kwargs):
+    instance._list_filters = list_cache.ticket_filter_state(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def invalidate_list_pages(sender, instance, created, **kwargs):
+    """Bump the cached ticket list generations this save could affect"""
+    new_filters = list_cache.ticket_filter_state(instance)
+    if created:
+        list_cache.bump(list_cache.changed_generations(None, new_filters))
+    elif instance._list_filters is None or new_filters is None:
+        # Loaded or saved with deferred filter fields; nothing to diff against
+        list_cache.bump_all()
+    else:
+        list_cache.bump(list_cache.changed_generations(instance._list_filters, new_filters))
+    instance._list_filters = new_filters
+
+
+@receiver(post_delete, sender=Ticket)
+def invalidate_deleted_list_pages(sender, instance, **kwargs):
+    list_cache.bump(list_cache.changed_generations(instance._list_filters, None))
+
+
+@receiver(post_init, sender=Ticket)
+def remember_percolated_values(sender, instance, **kwargs):
+    instance._percolated = saved_searches.snapshot(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def queue_saved_search_alerts(sender, instance, created, **kwargs):
+    """Percolate a created ticket, or an edit to the fields saved searches filter on"""
+    current = saved_searches.snapshot(instance)
+    previous = instance._percolated
+    instance._percolated = current
+    if created:
+        previous_state = None
+    elif previous is None or current is None or previous == current:
+        return
+    else:
+        previous_state = saved_searches.ticket_state(previous)
+
+    # Views and the admin record who made an edit on the instance
+    acting_user_id = instance.created_by_id if created else getattr(instance, '_changed_by_id', None)
+    acting_user_id = str(acting_user_id) if acting_user_id else None
+
+    from .tasks import percolate_saved_searches
+    ticket_id = str(instance.id)
+    transaction.on_commit(lambda: percolate_saved_searches.delay(ticket_id, previous_state, acting_user_id))
+
+
+@receiver(post_init, sender=Ticket)
+def remember_attachments(sender, instance, **kwargs):
+    attachments = instance.__dict__.get('attachments')
+    # None when deferred; a copy so in-place edits of the list still count as changes
+    instance._loaded_attachments = None if attachments is None else list(attachments)
+
+
+@receiver(post_save, sender=Ticket)
+def queue_attachment_previews(sender, instance, created, **kwargs):
+    """Queue preview generation when a ticket's attachments changed"""
+    previous = instance._loaded_attachments
+    current = instance.__dict__.get('attachments')
+    instance._loaded_attachments = None if current is None else list(current)
+    if not current:
+        return
+    if not created and previous is not None and previous == current:
+        return
+
+    from .tasks import process_ticket_attachments
+    ticket_id = str(instance.id)
+    transaction.on_commit(lambda: process_ticket_attachments.delay(ticket_id))
+
+
+@receiver(post_save, sender=Ticket)
+def update_duplicate_index(sender, instance, **kwargs):
+    """Reflect title and open/closed changes in this process's duplicate index"""
+    from .duplicates import duplicate_index
+    if not duplicate_index.loaded:
+        return
+    ticket_id, title, status, created_by_id = instance.id, instance.title, instance.status, instance.created_by_id
+    transaction.on_commit(lambda: duplicate_index.apply(ticket_id, title, status, created_by_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_from_duplicate_index(sender, instance, **kwargs):
+    """Drop the ticket here and make other processes reload their duplicate index"""
+    from .duplicates import duplicate_index, bump_removal_generation
+    ticket_id = instance.id
+
+    def remove():
+        duplicate_index.remove(ticket_id)
+        bump_removal_generation()
+    transaction.on_commit(remove)
+
+
+@receiver(post_delete, sender=Ticket)
+def drop_ticket_vector(sender, instance, **kwargs):
+    """Delete the similarity vector with the ticket, unless it is being archived"""
+    from .archive import is_archiving
+    from .models import TicketVector
+    from .similarity import bump_generation
+    if is_archiving():
+        return
+    if TicketVector.objects.filter(ticket_id=instance.id).delete()[0]:
+        transaction.on_commit(bump_generation)
+
+
+SIMILARITY_FIELDS = ('title', 'description', 'tags', 'status')
+
+
+def _similarity_values(instance):
+    values = instance.__dict__
+    if not all(field in values for field in SIMILARITY_FIELDS):
+        return None
+    # A copy of tags, so in-place edits of the list still count as changes
+    return values['title'], values['description'], list(values['tags'] or []), values['status']
+
+
+@receiver(post_init, sender=Ticket)
+def remember_similarity_values(sender, instance, **kwargs):
+    instance._similarity_values = _similarity_values(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def queue_vector_update(sender, instance, created, **kwargs):
+    """Refresh the ticket's similarity vector when its text or status changes"""
+    current = _similarity_values(instance)
+    previous = instance._similarity_values
+    instance._similarity_values = current
+    if not created and previous is not None and previous == current:
+        return
+
+    from .tasks import update_ticket_vector
+    ticket_id = str(instance.id)
+    transaction.on_commit(lambda: update_ticket_vector.delay(ticket_id))
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_activity(sender, instance, created, **kwargs):
+    """Bump the ticket's comment counter and last activity in a single UPDATE"""
+    if created:
+        Ticket.objects.filter(pk=instance.ticket_id).update(
+            comment_count=F('comment_count') + 1,
+            last_activity_at=instance.created_at,
+            last_comment_by=instance.author_id
+        )
+        list_cache.bump_activity()
+
+
+@receiver(post_delete, sender=Comment)
+def release_comment_count(sender, instance, origin=None, **kwargs):
+    # Nothing to update when the comment goes with its ticket (deletion or archiving)
+    if isinstance(origin, Ticket) or getattr(origin, 'model', None) is Ticket:
+        return
+    # last_comment_by is left as is; repair_ticket_activity recomputes it
+    Ticket.objects.filter(pk=instance.ticket_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+    list_cache.bump_activity()
+
+
+@receiver(post_save, sender=TicketStatusHistory)
+def record_status_activity(sender, instance, created, **kwargs):
+    if created:
+        Ticket.objects.filter(pk=instance.ticket_id).update(last_activity_at=instance.changed_at)
+        list_cache.bump_activity()
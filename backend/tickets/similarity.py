@@ -0,0 +1,234 @@
+"""
+Similar resolved ticket recommendations.
+
+Every ticket has a precomputed term-frequency vector (``TicketVector``)
+built from its title, description and tags. Terms are hashed into a
+fixed feature space, so no vocabulary table is needed, and vectors are
+stored as packed int32 indices and float32 weights.
+
+Each process keeps an inverted (column-major) TF-IDF matrix of the
+resolved tickets in NumPy arrays. Scoring a query only touches the columns
+of the query's terms. A background thread in each process rebuilds the
+matrix when the vector generation counter in the cache changes, which only
+happens when a resolved ticket's vector changes or a ticket enters or leaves
+the resolved set. The new matrix is swapped in whole, so requests keep
+scoring against the previous one meanwhile, and until the first build
+finishes there are no recommendations. Top-k results are cached per ticket,
+generation and query vector, so editing an open ticket only drops its own
+entry.
+
+Tickets saved before vectors existed have none; ``python manage.py
+rebuild_ticket_vectors`` backfills them.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .models import Ticket, TicketVector, ArchivedTicket
+
+logger = logging.getLogger(__name__)
+
+NUM_FEATURES = 2 ** 18
+GENERATION_KEY = 'ticket_similarity:generation'
+RESOLVED_STATUSES = ['delivered', 'closed']
+
+_TOKEN_RE = re.compile(r'[a-z0-9]{2,}')
+STOP_WORDS = frozenset("""
+    a an and are as at be by can for from has have in is it its of on or
+    please should that the this to was we will with would need needs
+""".split())
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def term_vector(title, description, tags):
+    """Return sorted hashed term indices (int32) and log-scaled TF weights (float32)"""
+    # Title terms count double; they describe the request most directly
+    tokens = tokenize(title) * 2 + tokenize(description) + tokenize(' '.join(tags or []))
+    counts = Counter(zlib.crc32(token.encode()) % NUM_FEATURES for token in tokens)
+    indices = np.array(sorted(counts), dtype=np.int32)
+    weights = np.array([1.0 + math.log(counts[index]) for index in indices], dtype=np.float32)
+    return indices, weights
+
+
+def vectorize(ticket):
+    """Compute and store the vector for a ticket; True if the resolved-ticket matrix changed"""
+    indices, weights = term_vector(ticket.title, ticket.description, ticket.tags)
+    values = {
+        'indices': indices.tobytes(),
+        'weights': weights.tobytes(),
+        'is_resolved': ticket.status in RESOLVED_STATUSES,
+    }
+    stored = TicketVector.objects.filter(ticket=ticket).values(*values).first()
+    if stored is not None:
+        stored.update(indices=bytes(stored['indices']), weights=bytes(stored['weights']))
+        if stored == values:
+            return False
+
+    TicketVector.objects.update_or_create(ticket=ticket, defaults=values)
+    return values['is_resolved'] or bool(stored and stored['is_resolved'])
+
+
+def get_generation():
+    return cache.get(GENERATION_KEY, 0)
+
+
+def bump_generation():
+    """Signal every process that stored vectors changed"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+class SimilarityMatrix:
+    """Column-major TF-IDF matrix over resolved tickets, as of one generation"""
+
+    def __init__(self, generation):
+        self.generation = generation
+        ticket_ids, index_parts, weight_parts = [], [], []
+        rows = TicketVector.objects.filter(is_resolved=True).values_list('ticket_id', 'indices', 'weights')
+        for ticket_id, indices, weights in rows.iterator(chunk_size=2000):
+            ticket_ids.append(ticket_id)
+            index_parts.append(np.frombuffer(indices, dtype=np.int32))
+            weight_parts.append(np.frombuffer(weights, dtype=np.float32))
+
+        if not ticket_ids:
+            self.ticket_ids, self.idf = [], np.ones(NUM_FEATURES, dtype=np.float32)
+            self.col_ptr = np.zeros(NUM_FEATURES + 1, dtype=np.int64)
+            self.rows = np.zeros(0, dtype=np.int32)
+            self.values = np.zeros(0, dtype=np.float32)
+            return
+
+        lengths = np.array([len(part) for part in index_parts])
+        doc_rows = np.repeat(np.arange(len(ticket_ids), dtype=np.int32), lengths)
+        indices = np.concatenate(index_parts)
+        values = np.concatenate(weight_parts)
+
+        document_frequency = np.bincount(indices, minlength=NUM_FEATURES)
+        idf = (np.log((1 + len(ticket_ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        values = values * idf[indices]
+        norms = np.sqrt(np.bincount(doc_rows, weights=values ** 2, minlength=len(ticket_ids)))
+        values = (values / np.maximum(norms[doc_rows], 1e-9)).astype(np.float32)
+
+        order = np.argsort(indices, kind='stable')
+        sorted_indices = indices[order]
+        self.rows = doc_rows[order]
+        self.values = values[order]
+        self.col_ptr = np.searchsorted(sorted_indices, np.arange(NUM_FEATURES + 1))
+        self.idf = idf
+        self.ticket_ids = ticket_ids
+
+    def top_k(self, indices, weights, k, exclude_id=None):
+        """Return ``(ticket_id, score)`` for the k most similar resolved tickets"""
+        if not self.ticket_ids or not len(indices):
+            return []
+
+        query = weights * self.idf[indices]
+        query = query / max(float(np.linalg.norm(query)), 1e-9)
+
+        scores = np.zeros(len(self.ticket_ids), dtype=np.float32)
+        for term, weight in zip(indices, query):
+            start, end = self.col_ptr[term], self.col_ptr[term + 1]
+            if start != end:
+                scores[self.rows[start:end]] += weight * self.values[start:end]
+
+        # One extra in case the query ticket itself is among the results
+        candidates = min(k + 1, len(scores))
+        best = np.argpartition(-scores, candidates - 1)[:candidates]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for row in best:
+            ticket_id = self.ticket_ids[row]
+            if scores[row] <= 0 or ticket_id == exclude_id:
+                continue
+            results.append((ticket_id, float(scores[row])))
+        return results[:k]
+
+
+class SimilarityIndex:
+    """The current matrix of this process, kept up to date by a background thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.matrix = None
+        self._refresher_pid = None
+
+    def refresh(self):
+        """Build and swap in a new matrix if the vector generation moved on"""
+        generation = get_generation()
+        if self.matrix is None or self.matrix.generation != generation:
+            self.matrix = SimilarityMatrix(generation)
+
+    def ensure_refresher(self):
+        # Started on first use in each process: threads do not survive a fork
+        if self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._refresher_pid != os.getpid():
+                self._refresher_pid = os.getpid()
+                threading.Thread(target=_refresh_periodically, name='similarity-index', daemon=True).start()
+
+
+similarity_index = SimilarityIndex()
+
+
+def _refresh_periodically():
+    while True:
+        try:
+            similarity_index.refresh()
+        except Exception:
+            logger.exception('Could not refresh the similarity index')
+        finally:
+            # This thread's connections would otherwise sit idle until the next check
+            connections.close_all()
+        time.sleep(settings.SIMILARITY_INDEX_CHECK_SECONDS)
+
+
+def similar_tickets(ticket, k=5):
+    """Return up to k resolved tickets similar to ``ticket``, best first"""
+    similarity_index.ensure_refresher()
+    matrix = similarity_index.matrix
+    if matrix is None:
+        return []
+
+    indices, weights = term_vector(ticket.title, ticket.description, ticket.tags)
+    query_hash = zlib.crc32(indices.tobytes() + weights.tobytes())
+    cache_key = f'ticket_similarity:{ticket.id}:{matrix.generation}:{query_hash}:{k}'
+    matches = cache.get(cache_key)
+    if matches is None:
+        matches = [
+            (ticket_id, score)
+            for ticket_id, score in matrix.top_k(indices, weights, k, exclude_id=ticket.id)
+            if score >= settings.SIMILARITY_MIN_SCORE
+        ]
+        cache.set(cache_key, matches, settings.SIMILARITY_CACHE_SECONDS)
+
+    if not matches:
+        return []
+
+    scores = dict(matches)
+    tickets = list(Ticket.objects.filter(id__in=scores).only('id', 'title', 'status', 'closed_at'))
+    archived = scores.keys() - {similar.id for similar in tickets}
+    if archived:
+        # Archived tickets keep their vectors; their links open the archived copy
+        tickets += ArchivedTicket.objects.filter(id__in=archived).only('id', 'title', 'status', 'closed_at')
+    tickets = sorted(tickets, key=lambda t: scores[t.id], reverse=True)
+    for similar in tickets:
+        similar.similarity = round(scores[similar.id] * 100)
+    return tickets
@@ -0,0 +1,235 @@
+import os
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Ticket, AttachmentPreview, TaskWatermark, ACTIVE_STATUSES
+from . import previews
+
+SLA_SCAN_WATERMARK = 'sla_breach_scan'
+
+
+@shared_task(soft_time_limit=300, time_limit=360)
+def process_ticket_attachments(ticket_id):
+    """Generate previews for every attachment of a ticket and refresh its search text"""
+    try:
+        ticket = Ticket.objects.get(id=ticket_id)
+    except Ticket.DoesNotExist:
+        return f"Ticket {ticket_id} not found"
+
+    processed = 0
+    linked = []
+    for path in ticket.attachments:
+        try:
+            content_hash = previews.hash_file(path)
+        except (OSError, ValueError):
+            # Missing or unreadable file; keep previewing the rest
+            continue
+
+        preview, created = _get_or_create_preview(content_hash, path)
+        if preview.status == 'pending':
+            _process_preview(preview, path)
+            processed += 1
+        linked.append(preview)
+
+    ticket.attachment_previews.set(linked)
+
+    attachment_text = ' '.join(p.extracted_text for p in linked if p.extracted_text)
+    Ticket.objects.filter(id=ticket.id).update(attachment_text=attachment_text)
+
+    return f"Processed {processed} of {len(linked)} attachments for ticket {ticket.title}"
+
+
+def _get_or_create_preview(content_hash, path):
+    try:
+        return AttachmentPreview.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={
+                'file_name': os.path.basename(path),
+                'kind': previews.get_kind(path),
+            }
+        )
+    except IntegrityError:
+        # Another worker created the same content hash concurrently
+        return AttachmentPreview.objects.get(content_hash=content_hash), False
+
+
+def _process_preview(preview, path):
+    try:
+        if preview.kind == 'image':
+            preview.thumbnail = previews.generate_thumbnail(path, preview.content_hash)
+        else:
+            preview.extracted_text = previews.extract_text(path, preview.kind)
+        preview.status = 'ready'
+        preview.error = ''
+    except Exception as e:
+        preview.status = 'failed'
+        preview.error = str(e)
+    preview.processed_at = timezone.now()
+    preview.save(update_fields=['thumbnail', 'extracted_text', 'status', 'error', 'processed_at'])
+
+
+@shared_task
+def scan_sla_breaches():
+    """Send one escalation per admin for tickets that became overdue since the last scan"""
+    from notifications.models import Notification
+    from notifications.tasks import send_email_notification
+    from users.directory import get_staff
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Row lock serialises concurrent scanners so a breach is reported once
+        watermark, _ = TaskWatermark.objects.select_for_update().get_or_create(
+            name=SLA_SCAN_WATERMARK,
+            defaults={'value': now - timedelta(hours=settings.SLA_SCAN_INITIAL_LOOKBACK_HOURS)}
+        )
+
+        # Due dates that passed since the last run (range scan over the partial
+        # active due_date index), plus tickets saved since then with a due date
+        # already in the past; each due date is escalated once
+        breached = list(
+            Ticket.objects.filter(status__in=ACTIVE_STATUSES, due_date__lte=now)
+            .filter(Q(due_date__gt=watermark.value) | Q(updated_at__gt=watermark.value))
+            .exclude(sla_breach_reported_for=F('due_date'))
+            .select_related('assigned_to').order_by('due_date')
+        )
+
+        watermark.value = now
+        watermark.save(update_fields=['value', 'updated_at'])
+
+        if not breached:
+            return "No new SLA breaches"
+
+        Ticket.objects.filter(id__in=[ticket.id for ticket in breached]).update(
+            sla_breach_reported_for=F('due_date')
+        )
+
+        titles = ', '.join(ticket.title for ticket in breached[:10])
+        if len(breached) > 10:
+            titles += f' and {len(breached) - 10} more'
+
+        admins = get_staff(role='admin')
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=admin.id,
+                title=f'SLA Breach: {len(breached)} ticket(s) overdue',
+                message=f'The following tickets passed their due date: {titles}',
+                ticket=breached[0] if len(breached) == 1 else None,
+                notification_type='both'
+            )
+            for admin in admins
+        ])
+
+        # Admins on hourly or daily digests get the alert in their next digest
+        notification_ids = [str(notification.id) for notification in notifications]
+        immediate_ids = [
+            str(notification.id) for notification, admin in zip(notifications, admins)
+            if admin.email_delivery == 'immediate'
+        ]
+        transaction.on_commit(lambda: [
+            send_email_notification.apply_async((notification_id,), queue='realtime')
+            for notification_id in immediate_ids
+        ])
+
+    return f"Escalated {len(breached)} SLA breaches to {len(notification_ids)} admins"
+
+
+@shared_task
+def reconcile_assignee_workloads():
+    """Repair open-ticket counters that drifted from the tickets"""
+    from .assignment import reconcile_workloads
+
+    drifted = reconcile_workloads()
+    return f"Reconciled {drifted} drifted workload counters"
+
+
+@shared_task
+def percolate_saved_searches(ticket_id, previous=None, acting_user_id=None):
+    """Alert the owners of saved searches a created or edited ticket now matches
+
+    The user who made the change is not alerted about it.
+    """
+    from notifications.models import Notification
+    from notifications.tasks import queue_email
+    from .saved_searches import percolate, ticket_state
+
+    try:
+        ticket = Ticket.objects.get(id=ticket_id)
+    except Ticket.DoesNotExist:
+        return f"Ticket {ticket_id} not found"
+
+    # One alert per user, however many of their searches matched
+    matched = {}
+    for saved_search in percolate(ticket_state(ticket.__dict__), previous):
+        if str(saved_search.user_id) != acting_user_id:
+            matched.setdefault(saved_search.user_id, saved_search)
+    if not matched:
+        return f"No saved searches matched ticket {ticket.title}"
+
+    searches = list(matched.values())
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=saved_search.user_id,
+                ticket=ticket,
+                event_type='saved_search',
+                title=f'Saved search "{saved_search.name}": {ticket.title}',
+                message=f'{ticket.title} now matches your saved search "{saved_search.name}"',
+                notification_type='both'
+            )
+            for saved_search in searches
+        ], batch_size=settings.SAVED_SEARCH_ALERT_BATCH_SIZE)
+
+        emails = [
+            (notification.id, saved_search.user.email_delivery)
+            for notification, saved_search in zip(notifications, searches)
+        ]
+        transaction.on_commit(lambda: [
+            queue_email(notification_id, ticket.priority, delivery) for notification_id, delivery in emails
+        ])
+
+    return f"Alerted {len(searches)} users about ticket {ticket.title}"
+
+
+@shared_task
+def update_ticket_vector(ticket_id):
+    """Recompute the similarity vector of a changed ticket"""
+    from .similarity import vectorize, bump_generation
+
+    try:
+        ticket = Ticket.objects.only('id', 'title', 'description', 'tags', 'status').get(id=ticket_id)
+    except Ticket.DoesNotExist:
+        return f"Ticket {ticket_id} not found"
+
+    # Open tickets are only ever queries; the matrix holds resolved ones
+    if not vectorize(ticket):
+        return f"Similarity vector of ticket {ticket.title} left the index unchanged"
+    bump_generation()
+    return f"Updated similarity vector for ticket {ticket.title}"
+
+
+@shared_task
+def rebuild_ticket_vectors(chunk_size=1000):
+    """Recompute similarity vectors for every ticket"""
+    from .similarity import vectorize, bump_generation
+
+    count = 0
+    tickets = Ticket.objects.only('id', 'title', 'description', 'tags', 'status').order_by('id')
+    for ticket in tickets.iterator(chunk_size=chunk_size):
+        vectorize(ticket)
+        count += 1
+
+    bump_generation()
+    return f"Rebuilt similarity vectors for {count} tickets"
+
+
+@shared_task
+def archive_closed_tickets():
+    """Move long-closed tickets and their comments and history to the archive tables"""
+    from .archive import archive_closed_tickets as archive
+
+    count = archive()
+    return f"Archived {count} closed tickets"
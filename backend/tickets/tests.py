@@ -0,0 +1,205 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.models import Notification
+from ticketing_system.celery import app as celery_app
+from users.models import User
+
+from . import list_cache
+from .archive import archive_chunk
+from .forms import SavedSearchForm
+from .models import Comment, SavedSearch, Ticket
+
+
+# Pages render without a collectstatic manifest
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TicketTestCase(TestCase):
+    """Runs Celery tasks in-process, as on-commit callbacks queue them"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(setattr, celery_app.conf, 'task_always_eager', celery_app.conf.task_always_eager)
+        celery_app.conf.task_always_eager = True
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='password', role='automation_team'
+        )
+        self.requester = User.objects.create_user(
+            email='requester@example.com', username='requester', password='password'
+        )
+
+    def create_ticket(self, **fields):
+        fields = {'title': 'Export the weekly sales report', 'description': 'Runs every Monday morning',
+                  'category': Ticket.CATEGORY_CHOICES[0][0], 'created_by': self.requester, **fields}
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(**fields)
+
+
+class TicketListCacheTests(TicketTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def listed(self, **params):
+        response = self.client.get(reverse('tickets:list'), params)
+        self.assertEqual(response.status_code, 200)
+        ids = [ticket.id for ticket in response.context['tickets']]
+        # Rows are loaded fresh, so a stale entry shows up in the cached count
+        self.assertEqual(response.context['paginator'].count, len(ids))
+        return ids
+
+    def test_pages_are_served_from_the_cache(self):
+        ticket = self.create_ticket(priority='high')
+        self.assertEqual(self.listed(priority='high'), [ticket.id])
+
+        # bulk_create sends no signals, so the cached page stands until a bulk bump
+        [added] = Ticket.objects.bulk_create([Ticket(title='Sync invoices', description='Nightly',
+                                                     category=ticket.category, priority='high',
+                                                     created_by=self.requester)])
+        self.assertEqual(self.listed(priority='high'), [ticket.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            list_cache.bump_all()
+        self.assertEqual(self.listed(priority='high'), [added.id, ticket.id])
+
+    def test_created_ticket_is_listed(self):
+        first = self.create_ticket(priority='high')
+        self.assertEqual(self.listed(priority='high'), [first.id])
+        self.assertEqual(self.listed(), [first.id])
+
+        second = self.create_ticket(priority='high')
+        self.assertEqual(self.listed(priority='high'), [second.id, first.id])
+        self.assertEqual(self.listed(), [second.id, first.id])
+
+    def test_filter_field_edit_moves_ticket_between_lists(self):
+        ticket = self.create_ticket(priority='high')
+        self.assertEqual(self.listed(priority='high'), [ticket.id])
+        self.assertEqual(self.listed(priority='low'), [])
+
+        ticket.priority = 'low'
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(self.listed(priority='high'), [])
+        self.assertEqual(self.listed(priority='low'), [ticket.id])
+
+    def test_unrelated_edit_keeps_cached_pages(self):
+        ticket = self.create_ticket(priority='high')
+        key = list_cache.cache_key_for(self.staff, {'priority': 'high'})
+
+        ticket.title = 'Export the monthly sales report'
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(list_cache.cache_key_for(self.staff, {'priority': 'high'}), key)
+
+    def test_comment_reorders_activity_sort(self):
+        older = self.create_ticket()
+        newer = self.create_ticket()
+        self.assertEqual(self.listed(sort='recently_active'), [newer.id, older.id])
+        newest_key = list_cache.cache_key_for(self.staff, {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(ticket=older, author=self.staff, content='Picked this up')
+        self.assertEqual(self.listed(sort='recently_active'), [older.id, newer.id])
+        self.assertEqual(self.listed(sort='most_comments'), [older.id, newer.id])
+        # The newest-first sort does not read activity
+        self.assertEqual(list_cache.cache_key_for(self.staff, {}), newest_key)
+
+    def test_deleted_ticket_is_dropped(self):
+        kept = self.create_ticket(priority='high')
+        deleted = self.create_ticket(priority='high')
+        self.assertEqual(self.listed(priority='high'), [deleted.id, kept.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+        self.assertEqual(self.listed(priority='high'), [kept.id])
+
+    def test_archived_ticket_is_dropped(self):
+        kept = self.create_ticket(priority='high')
+        archived = self.create_ticket(priority='high')
+        with self.captureOnCommitCallbacks(execute=True):
+            archived.change_status('closed', self.staff)
+        self.assertEqual(self.listed(priority='high'), [archived.id, kept.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_chunk(timezone.now() + timedelta(seconds=1), 10), 1)
+        self.assertEqual(self.listed(priority='high'), [kept.id])
+
+    def test_regular_users_are_cached_per_user(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='password')
+        self.assertNotEqual(list_cache.cache_key_for(self.requester, {}), list_cache.cache_key_for(other, {}))
+        self.assertIsNone(list_cache.cache_key_for(self.staff, {'search': 'report'}))
+        self.assertIsNone(list_cache.cache_key_for(self.staff, {'priority': 'bogus'}))
+
+
+class SavedSearchPercolatorTests(TicketTestCase):
+
+    def save_search(self, user, **fields):
+        fields.setdefault('name', f'Search {SavedSearch.objects.count()}')
+        return SavedSearch.objects.create(user=user, **fields)
+
+    def alerted(self, user):
+        return list(Notification.objects.filter(user=user, event_type='saved_search')
+                    .values_list('ticket_id', flat=True))
+
+    def test_created_ticket_alerts_matching_searches(self):
+        self.save_search(self.staff, priority='urgent', search='sales report')
+        self.save_search(self.staff, name='Invoices', search='invoice')
+
+        ticket = self.create_ticket(priority='urgent')
+        self.create_ticket(priority='low')
+        self.assertEqual(self.alerted(self.staff), [ticket.id])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_edit_alerts_only_when_ticket_starts_matching(self):
+        self.save_search(self.staff, priority='urgent')
+        ticket = self.create_ticket(priority='low')
+        self.assertEqual(self.alerted(self.staff), [])
+
+        ticket.priority = 'urgent'
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(self.alerted(self.staff), [ticket.id])
+
+        ticket.title = 'Export the monthly sales report'
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(self.alerted(self.staff), [ticket.id])
+
+    def test_acting_user_is_not_alerted(self):
+        self.save_search(self.requester, category=Ticket.CATEGORY_CHOICES[0][0])
+        self.save_search(self.staff, status='in_progress')
+
+        ticket = self.create_ticket()
+        self.assertEqual(self.alerted(self.requester), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.change_status('in_progress', self.staff)
+        self.assertEqual(self.alerted(self.staff), [])
+
+    def test_regular_users_match_only_their_own_tickets(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='password')
+        saved_search = self.save_search(other, priority='urgent')
+        self.assertEqual(saved_search.anchor, f'created_by={other.id}')
+
+        self.create_ticket(priority='urgent')
+        self.assertEqual(self.alerted(other), [])
+
+    def test_search_is_anchored_on_its_longest_word(self):
+        saved_search = self.save_search(self.staff, priority='urgent', search='sales reporting')
+        self.assertEqual(saved_search.anchor, 'word=reporting')
+
+    def test_form_rejects_search_without_a_predicate(self):
+        form = SavedSearchForm({'name': 'Anything', 'search': '?!', 'tags': ''}, user=self.staff)
+        self.assertFalse(form.is_valid())
+        self.assertIn('Choose at least one filter before saving a search.', form.non_field_errors())
+
+        form = SavedSearchForm({'name': 'Reports', 'search': 'report', 'tags': ''}, user=self.staff)
+        self.assertTrue(form.is_valid(), form.errors)
@@ -0,0 +1,50 @@
+"""
+Ticket title suggestions for search boxes and "link related ticket" pickers.
+
+Two index-backed passes, each stopping at ``limit`` rows:
+
+* prefix matches (``istartswith``), a range scan over the
+  ``UPPER(title) text_pattern_ops`` index from migration 0012
+* if that leaves room, fragment matches (``icontains``, three characters or
+  more), served by the trigram index from migration 0010
+
+Neither pass sorts the full set of matches, which is what keeps short, common
+queries fast on a large table; the few rows returned are ranked in Python.
+Both indexes are PostgreSQL only. Only live tickets are suggested, with the
+same visibility rules as the ticket list.
+"""
+
+import uuid
+
+from .models import Ticket
+
+MIN_FRAGMENT_LENGTH = 3
+
+
+def suggest(query, user, limit):
+    """Return up to ``limit`` ``(id, title, status)`` rows for ``query`` visible to ``user``"""
+    query = query.strip()
+    tickets = Ticket.objects.order_by()
+    # Regular users only see their own tickets
+    if not (user.is_admin or user.is_automation_team):
+        tickets = tickets.filter(created_by=user)
+    columns = ('id', 'title', 'status')
+
+    try:
+        return list(tickets.filter(pk=uuid.UUID(query)).values_list(*columns))
+    except ValueError:
+        pass
+
+    prefixed = sorted(
+        tickets.filter(title__istartswith=query).values_list(*columns)[:limit],
+        key=lambda row: (len(row[1]), row[1].lower())
+    )
+    if len(prefixed) == limit or len(query) < MIN_FRAGMENT_LENGTH:
+        return prefixed
+
+    fragments = (
+        tickets.filter(title__icontains=query)
+        .exclude(pk__in=[row[0] for row in prefixed])
+        .values_list(*columns)[:limit - len(prefixed)]
+    )
+    return prefixed + sorted(fragments, key=lambda row: (len(row[1]), row[1].lower()))
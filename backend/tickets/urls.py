@@ -6,6 +6,10 @@ app_name = 'tickets'
 urlpatterns = [
     path('', views.TicketListView.as_view(), name='list'),
     path('create/', views.TicketCreateView.as_view(), name='create'),
+    path('saved-searches/', views.save_search, name='save_search'),
+    path('saved-searches/<uuid:search_id>/delete/', views.delete_saved_search, name='delete_saved_search'),
+    path('typeahead/', views.typeahead, name='typeahead'),
+    path('duplicates/', views.duplicate_check, name='duplicate_check'),
     path('<uuid:pk>/', views.TicketDetailView.as_view(), name='detail'),
     path('<uuid:pk>/edit/', views.TicketUpdateView.as_view(), name='edit'),
     path('<uuid:ticket_id>/assign/', views.assign_ticket, name='assign'),
@@ -1,30 +1,71 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_http_methods
 from django.views.generic import ListView, CreateView, DetailView, UpdateView
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from datetime import timedelta
 from users.mixins import AdminRequiredMixin, AutomationTeamRequiredMixin, TicketOwnerMixin
-from .models import Ticket, Comment, TicketStatusHistory
+from users.directory import get_staff
+from ticketing_system.replicas import replica_reads
+from .models import Ticket, Comment, TicketStatusHistory, ArchivedTicket, SavedSearch
+from . import list_cache
+from .archive import CombinedTickets
+from .assignment import choose_assignee
+from .duplicates import find_duplicates
+from .typeahead import suggest
+from .similarity import similar_tickets
 from .forms import (
     TicketForm, TicketUpdateForm, TicketAssignmentForm,
-    TicketStatusForm, CommentForm
+    TicketStatusForm, CommentForm, SavedSearchForm
 )
 
 
+@replica_reads
 class TicketListView(LoginRequiredMixin, ListView):
     model = Ticket
     template_name = 'tickets/ticket_list.html'
     context_object_name = 'tickets'
     paginate_by = 20
 
+    # Each ordering is backed by an index on tickets
+    SORT_CHOICES = [
+        ('newest', 'Newest', ['-created_at']),
+        ('recently_active', 'Recently active', ['-last_activity_at']),
+        ('most_comments', 'Most comments', ['-comment_count', '-last_activity_at']),
+    ]
+
     def get_queryset(self):
+        queryset = self.filter_tickets(Ticket.objects.select_related(
+            'created_by', 'assigned_to', 'last_comment_by'
+        ).defer('attachment_text').with_overdue())
+
+        orderings = {value: ordering for value, _, ordering in self.SORT_CHOICES}
+        ordering = orderings.get(self.request.GET.get('sort'), orderings['newest'])
+
+        # Archived tickets are all closed, so the archive is only read for that filter
+        if self.request.GET.get('status') == 'closed' and not self.request.GET.get('overdue'):
+            archived = self.filter_tickets(ArchivedTicket.objects.select_related(
+                'created_by', 'assigned_to', 'last_comment_by'
+            ).defer('attachment_text'))
+            return CombinedTickets(queryset, archived, ordering)
+
+        queryset = queryset.order_by(*ordering)
+        key = list_cache.cache_key_for(self.request.user, self.request.GET)
+        if key:
+            return list_cache.CachedTicketPages(queryset, key)
+        return queryset
+
+    def filter_tickets(self, queryset):
+        """Apply the role scope and request filters to live or archived tickets"""
         user = self.request.user
-        queryset = Ticket.objects.select_related('created_by', 'assigned_to')
 
         # Filter based on user role
         if user.is_admin or user.is_automation_team:
@@ -39,7 +80,9 @@ class TicketListView(LoginRequiredMixin, ListView):
         priority_filter = self.request.GET.get('priority')
         category_filter = self.request.GET.get('category')
         assigned_filter = self.request.GET.get('assigned_to')
+        overdue_filter = self.request.GET.get('overdue')
         search_query = self.request.GET.get('search')
+        tags_filter = self.request.GET.get('tags', '')
 
         if status_filter:
             queryset = queryset.filter(status=status_filter)
@@ -49,10 +92,16 @@ class TicketListView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(category=category_filter)
         if assigned_filter:
             queryset = queryset.filter(assigned_to__id=assigned_filter)
+        if overdue_filter:
+            queryset = queryset.overdue()
+        for tag in (tag.strip() for tag in tags_filter.split(',')):
+            if tag:
+                queryset = queryset.filter(tags__contains=[tag])
         if search_query:
             queryset = queryset.filter(
                 Q(title__icontains=search_query) |
-                Q(description__icontains=search_query)
+                Q(description__icontains=search_query) |
+                Q(attachment_text__icontains=search_query)
             )
 
         return queryset
@@ -62,13 +111,11 @@ class TicketListView(LoginRequiredMixin, ListView):
         context['status_choices'] = Ticket.STATUS_CHOICES
         context['priority_choices'] = Ticket.PRIORITY_CHOICES
         context['category_choices'] = Ticket.CATEGORY_CHOICES
+        context['sort_choices'] = [(value, label) for value, label, _ in self.SORT_CHOICES]
 
         # Add assigned users filter for admin/automation team
         if self.request.user.is_admin or self.request.user.is_automation_team:
-            from users.models import User
-            context['assigned_users'] = User.objects.filter(
-                role__in=['admin', 'automation_team']
-            )
+            context['assigned_users'] = get_staff()
 
         # Preserve filter parameters
         context['current_filters'] = {
@@ -76,8 +123,12 @@ class TicketListView(LoginRequiredMixin, ListView):
             'priority': self.request.GET.get('priority', ''),
             'category': self.request.GET.get('category', ''),
             'assigned_to': self.request.GET.get('assigned_to', ''),
+            'overdue': self.request.GET.get('overdue', ''),
             'search': self.request.GET.get('search', ''),
+            'tags': self.request.GET.get('tags', ''),
+            'sort': self.request.GET.get('sort', ''),
         }
+        context['saved_searches'] = self.request.user.saved_searches.all()
 
         return context
 
@@ -88,24 +139,50 @@ class TicketCreateView(LoginRequiredMixin, CreateView):
     template_name = 'tickets/ticket_form.html'
     success_url = reverse_lazy('tickets:list')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['check_duplicates'] = True
+        return context
+
     def form_valid(self, form):
         form.instance.created_by = self.request.user
-        response = super().form_valid(form)
 
-        # Create notification for admins/automation team
+        # Ask the user to confirm before filing a likely duplicate
+        if not self.request.POST.get('ignore_duplicates'):
+            duplicates = find_duplicates(form.cleaned_data['title'], self.request.user)
+            if duplicates:
+                return self.render_to_response(self.get_context_data(form=form, duplicates=duplicates))
+
+        with transaction.atomic():
+            # Workload rows stay locked until the ticket and counters are saved
+            assignee = choose_assignee(form.instance)
+            if assignee:
+                form.instance.assigned_to = assignee
+            response = super().form_valid(form)
+
         from notifications.models import Notification
-        from users.models import User
+        from notifications.tasks import queue_emails
+
+        notifications = []
+        if assignee and assignee != self.request.user:
+            notifications.append(Notification.objects.create(
+                user=assignee,
+                title=f'Ticket Assigned: {form.instance.title}',
+                message='You have been automatically assigned to this ticket',
+                ticket=form.instance,
+                notification_type='both'
+            ))
 
         # Notify all admin and automation team users
-        notify_users = User.objects.filter(role__in=['admin', 'automation_team'])
-        for user in notify_users:
-            Notification.objects.create(
-                user=user,
+        for member in get_staff():
+            notifications.append(Notification.objects.create(
+                user_id=member.id,
                 title=f'New Ticket: {form.instance.title}',
                 message=f'A new ticket has been created by {self.request.user.get_full_name() or self.request.user.email}',
                 ticket=form.instance,
                 notification_type='both'
-            )
+            ))
+        queue_emails(notifications, form.instance.priority)
 
         messages.success(self.request, 'Ticket created successfully!')
         return response
@@ -116,6 +193,17 @@ class TicketDetailView(TicketOwnerMixin, DetailView):
     template_name = 'tickets/ticket_detail.html'
     context_object_name = 'ticket'
 
+    def get_object(self, queryset=None):
+        # Direct links to archived tickets fall back to the archive tables
+        if not hasattr(self, '_ticket'):
+            try:
+                self._ticket = super().get_object(queryset)
+            except Http404:
+                self._ticket = get_object_or_404(
+                    ArchivedTicket.objects.select_related('created_by', 'assigned_to'), pk=self.kwargs['pk']
+                )
+        return self._ticket
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         ticket = self.get_object()
@@ -128,10 +216,18 @@ class TicketDetailView(TicketOwnerMixin, DetailView):
         context['comments'] = comments.select_related('author').order_by('created_at')
         context['status_history'] = ticket.status_history.select_related('changed_by').order_by('-changed_at')
 
+        # Archived tickets are read-only
+        if getattr(ticket, 'is_archived', False):
+            context['archived'] = True
+            return context
+
+        context['attachment_previews'] = ticket.attachment_previews.all()
+
         # Add forms
         if ticket.can_be_edited_by(self.request.user):
             context['assignment_form'] = TicketAssignmentForm(instance=ticket)
             context['status_form'] = TicketStatusForm(instance=ticket)
+            context['similar_tickets'] = similar_tickets(ticket)
 
         context['comment_form'] = CommentForm(user=self.request.user)
 
@@ -148,6 +244,7 @@ class TicketUpdateView(AdminRequiredMixin, UpdateView):
         old_status = Ticket.objects.get(pk=self.object.pk).status
         new_status = form.cleaned_data.get('status')
 
+        form.instance._changed_by_id = self.request.user.id
         response = super().form_valid(form)
 
         # Create status history if changed
@@ -162,13 +259,15 @@ class TicketUpdateView(AdminRequiredMixin, UpdateView):
             # Notify ticket creator about status change
             if self.object.created_by and self.object.created_by != self.request.user:
                 from notifications.models import Notification
-                Notification.objects.create(
-                    user=self.object.created_by,
+                from notifications.tasks import queue_emails
+                queue_emails([Notification.record_event(
+                    user_id=self.object.created_by_id,
+                    ticket=self.object,
+                    event_type='status',
                     title=f'Status Update: {self.object.title}',
                     message=f'Your ticket status has been updated from {old_status} to {new_status}',
-                    ticket=self.object,
                     notification_type='both'
-                )
+                )], self.object.priority)
 
         # Notify about assignment if changed
         old_assigned = Ticket.objects.get(pk=self.object.pk).assigned_to
@@ -176,18 +275,67 @@ class TicketUpdateView(AdminRequiredMixin, UpdateView):
 
         if old_assigned != new_assigned and new_assigned:
             from notifications.models import Notification
-            Notification.objects.create(
+            from notifications.tasks import queue_emails
+            queue_emails([Notification.objects.create(
                 user=new_assigned,
                 title=f'Ticket Assigned: {self.object.title}',
                 message=f'You have been assigned to this ticket',
                 ticket=self.object,
                 notification_type='both'
-            )
+            )], self.object.priority)
 
         messages.success(self.request, 'Ticket updated successfully!')
         return response
 
 
+@login_required
+@require_http_methods(["GET"])
+def duplicate_check(request):
+    """Return likely duplicates of a ticket title while it is being typed"""
+    title = request.GET.get('title', '').strip()
+    if len(title) < 5:
+        return JsonResponse({'duplicates': []})
+
+    data = []
+    for ticket in find_duplicates(title, request.user):
+        data.append({
+            'id': str(ticket.id),
+            'title': ticket.title,
+            'status': ticket.get_status_display(),
+            'score': ticket.duplicate_score,
+            'url': reverse('tickets:detail', kwargs={'pk': ticket.id}),
+        })
+
+    return JsonResponse({'duplicates': data})
+
+
+@replica_reads
+@login_required
+@require_http_methods(["GET"])
+def typeahead(request):
+    """Suggest tickets by title prefix, title fragment or ID as the user types"""
+    query = request.GET.get('q', '').strip()
+    if len(query) < 2:
+        return JsonResponse({'results': []})
+
+    try:
+        limit = min(int(request.GET.get('limit', settings.TYPEAHEAD_LIMIT)), settings.TYPEAHEAD_MAX_LIMIT)
+    except ValueError:
+        limit = settings.TYPEAHEAD_LIMIT
+
+    statuses = dict(Ticket.STATUS_CHOICES)
+    results = [
+        {
+            'id': str(ticket_id),
+            'title': title,
+            'status': statuses.get(status, status),
+            'url': reverse('tickets:detail', kwargs={'pk': ticket_id}),
+        }
+        for ticket_id, title, status in suggest(query, request.user, max(limit, 1))
+    ]
+    return JsonResponse({'results': results})
+
+
 @login_required
 def assign_ticket(request, ticket_id):
     """Assign ticket to a user"""
@@ -201,19 +349,21 @@ def assign_ticket(request, ticket_id):
         form = TicketAssignmentForm(request.POST, instance=ticket)
         if form.is_valid():
             old_assigned = ticket.assigned_to
+            ticket._changed_by_id = request.user.id
             form.save()
 
             # Create notification if assigned to someone new
             new_assigned = ticket.assigned_to
             if new_assigned and old_assigned != new_assigned:
                 from notifications.models import Notification
-                Notification.objects.create(
+                from notifications.tasks import queue_emails
+                queue_emails([Notification.objects.create(
                     user=new_assigned,
                     title=f'Ticket Assigned: {ticket.title}',
                     message=f'You have been assigned to this ticket by {request.user.get_full_name() or request.user.email}',
                     ticket=ticket,
                     notification_type='both'
-                )
+                )], ticket.priority)
 
             messages.success(request, f'Ticket assigned to {new_assigned.get_full_name() if new_assigned else "Unassigned"}')
 
@@ -230,10 +380,12 @@ def update_status(request, ticket_id):
         return redirect('tickets:detail', pk=ticket_id)
 
     if request.method == 'POST':
+        # Read before validation: the form writes the new status onto the instance
+        old_status = ticket.status
         form = TicketStatusForm(request.POST, instance=ticket)
         if form.is_valid():
-            old_status = ticket.status
             new_status = form.cleaned_data['status']
+            ticket.status = old_status
             notes = form.cleaned_data.get('status_notes', '')
 
             ticket.change_status(new_status, request.user, notes)
@@ -241,13 +393,15 @@ def update_status(request, ticket_id):
             # Notify ticket creator about status change
             if ticket.created_by and ticket.created_by != request.user:
                 from notifications.models import Notification
-                Notification.objects.create(
-                    user=ticket.created_by,
+                from notifications.tasks import queue_emails
+                queue_emails([Notification.record_event(
+                    user_id=ticket.created_by_id,
+                    ticket=ticket,
+                    event_type='status',
                     title=f'Status Update: {ticket.title}',
                     message=f'Your ticket status has been updated from {old_status} to {new_status}',
-                    ticket=ticket,
                     notification_type='both'
-                )
+                )], ticket.priority)
 
             messages.success(request, f'Ticket status updated to {ticket.get_status_display()}')
 
@@ -273,38 +427,66 @@ def add_comment(request, ticket_id):
 
             # Notify other participants
             from notifications.models import Notification
+            from notifications.tasks import queue_emails
             participants = []
 
             # Notify ticket creator
-            if ticket.created_by and ticket.created_by != request.user:
-                participants.append(ticket.created_by)
+            if ticket.created_by_id and ticket.created_by_id != request.user.id:
+                participants.append(ticket.created_by_id)
 
             # Notify assigned user
-            if ticket.assigned_to and ticket.assigned_to != request.user:
-                participants.append(ticket.assigned_to)
+            if ticket.assigned_to_id and ticket.assigned_to_id != request.user.id:
+                participants.append(ticket.assigned_to_id)
 
             # Notify admin/automation team for internal comments
             if comment.comment_type == 'internal':
-                from users.models import User
-                team_members = User.objects.filter(
-                    role__in=['admin', 'automation_team']
-                ).exclude(id=request.user.id)
-                participants.extend(team_members)
-
-            for participant in participants:
-                Notification.objects.create(
-                    user=participant,
+                participants.extend(
+                    member.id for member in get_staff() if member.id != request.user.id
+                )
+
+            # A burst of comments on one ticket updates a single unread notification
+            queue_emails([
+                Notification.record_event(
+                    user_id=participant_id,
+                    ticket=ticket,
+                    event_type='comment' if comment.comment_type == 'public' else 'internal_note',
                     title=f'New Comment on: {ticket.title}',
                     message=f'{request.user.get_full_name() or request.user.email} added a {"comment" if comment.comment_type == "public" else "internal note"}',
-                    ticket=ticket,
                     notification_type='onscreen' if comment.comment_type == 'internal' else 'both'
                 )
+                for participant_id in participants
+            ], ticket.priority)
 
             messages.success(request, 'Comment added successfully!')
 
     return redirect('tickets:detail', pk=ticket_id)
 
 
+@login_required
+@require_http_methods(["POST"])
+def save_search(request):
+    """Save the ticket list's current filters under a name"""
+    form = SavedSearchForm(request.POST, user=request.user)
+    if form.is_valid():
+        saved_search = form.save()
+        messages.success(request, f'Saved search "{saved_search.name}". You will be notified of new matching tickets.')
+        return redirect(f"{reverse('tickets:list')}?{saved_search.query_string}")
+
+    for error in form.errors.values():
+        messages.error(request, error[0])
+    return redirect('tickets:list')
+
+
+@login_required
+@require_http_methods(["POST"])
+def delete_saved_search(request, search_id):
+    saved_search = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+    saved_search.delete()
+    messages.success(request, f'Deleted saved search "{saved_search.name}".')
+    return redirect('tickets:list')
+
+
+@replica_reads
 class MyTicketsView(LoginRequiredMixin, ListView):
     model = Ticket
     template_name = 'tickets/my_tickets.html'
@@ -314,7 +496,7 @@ class MyTicketsView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return Ticket.objects.filter(
             created_by=self.request.user
-        ).select_related('assigned_to').order_by('-created_at')
+        ).select_related('assigned_to').with_overdue().order_by('-created_at')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
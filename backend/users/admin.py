@@ -17,6 +17,9 @@ class UserAdmin(BaseUserAdmin):
         ('Personal info', {
             'fields': ('first_name', 'last_name', 'email', 'phone', 'department')
         }),
+        ('Notifications', {
+            'fields': ('email_delivery',)
+        }),
         ('Permissions', {
             'fields': ('role', 'is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')
         }),
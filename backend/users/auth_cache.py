@@ -0,0 +1,51 @@
+"""
+Per-user cache of the authenticated user row.
+
+The cached entry holds every concrete field except the password, plus the
+session auth hash derived from it. Users rebuilt from the cache have the
+password deferred, so saving them only writes the loaded fields, and
+``User.get_session_auth_hash`` answers from the cached hash. Entries are
+dropped by ``users.signals`` whenever the user is saved or deleted, and
+again once that transaction commits.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.base import DEFERRED
+
+CACHE_KEY = 'auth_user:{}'
+
+
+def _cache_key(user_id):
+    return CACHE_KEY.format(user_id)
+
+
+def get_cached_user(user_id):
+    from .models import User
+
+    data = cache.get(_cache_key(user_id))
+    if data is None:
+        return None
+
+    fields = User._meta.concrete_fields
+    values = [data['fields'].get(field.attname, DEFERRED) for field in fields]
+    user = User.from_db(DEFAULT_DB_ALIAS, [field.attname for field in fields], values)
+    user._session_auth_hash = data['session_auth_hash']
+    return user
+
+
+def cache_user(user):
+    data = {
+        'fields': {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        },
+        'session_auth_hash': user.get_session_auth_hash(),
+    }
+    cache.set(_cache_key(user.pk), data, settings.AUTH_USER_CACHE_SECONDS)
+
+
+def invalidate_user(user_id):
+    cache.delete(_cache_key(user_id))
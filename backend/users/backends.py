@@ -0,0 +1,15 @@
+from django.contrib.auth.backends import ModelBackend
+from .auth_cache import get_cached_user, cache_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that loads the session's user from the auth cache"""
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache_user(user)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,28 @@
+"""
+View decorators for the ``SERVER_MODE`` setting.
+
+Views are written once, as plain functions. ``async_under_asgi`` turns a
+view into a coroutine function when the ASGI app is served, so the handler
+awaits it from the async middleware chain; under WSGI the view is left as
+it is, since an async view there costs an event loop per request.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def async_under_asgi(view_func):
+    """Serve ``view_func`` as a coroutine under ASGI and unchanged under WSGI"""
+    if settings.SERVER_MODE != 'asgi':
+        return view_func
+
+    # The whole view, auth check and queries included, runs in one hop to
+    # the request's sync thread; the async ORM would make one hop per query
+    run = sync_to_async(view_func)
+
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        return await run(request, *args, **kwargs)
+    return _wrapped_view
@@ -0,0 +1,102 @@
+"""
+Directory of active staff (admin and automation team) users.
+
+The list is small and read on most ticket pages, forms and notification
+fan-outs, so it is kept in a process-local copy backed by the shared
+cache. A version counter in the shared cache lets each process notice
+changes made elsewhere. ``users.signals`` calls ``invalidate()`` whenever a
+user is saved or deleted, which covers role changes and deactivation.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+STAFF_ROLES = ['admin', 'automation_team']
+FIELDS = ('id', 'email', 'first_name', 'last_name', 'role', 'email_delivery')
+
+DATA_KEY = 'staff_directory:data'
+VERSION_KEY = 'staff_directory:version'
+
+
+class StaffMember:
+    """Lightweight read-only stand-in for a staff User"""
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            setattr(self, field, values[field])
+
+    def __str__(self):
+        from .models import User
+        return f"{self.email} ({dict(User.ROLE_CHOICES).get(self.role, self.role)})"
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_automation_team(self):
+        return self.role == 'automation_team'
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+
+_lock = threading.Lock()
+_process_cache = {}
+
+
+def _load(version):
+    from .models import User
+
+    rows = list(
+        User.objects.filter(role__in=STAFF_ROLES, is_active=True)
+        .order_by('first_name', 'last_name', 'email')
+        .values(*FIELDS)
+    )
+    # Tagged with the version read before the query: rows an invalidate()
+    # overtook while it ran are ignored by readers of the newer version
+    cache.set(DATA_KEY, {'version': version, 'rows': rows}, settings.STAFF_DIRECTORY_CACHE_SECONDS)
+    return rows
+
+
+def get_staff(role=None):
+    """Return active staff as ``StaffMember`` objects, optionally for one role"""
+    now = time.monotonic()
+    local = _process_cache.get('directory')
+
+    if local is None or now - local['checked_at'] >= settings.STAFF_DIRECTORY_LOCAL_SECONDS:
+        with _lock:
+            version = cache.get(VERSION_KEY, 0)
+            if local is None or local['version'] != version:
+                data = cache.get(DATA_KEY)
+                rows = data['rows'] if data and data['version'] == version else _load(version)
+                local = {'version': version, 'members': [StaffMember(**row) for row in rows]}
+            local['checked_at'] = now
+            _process_cache['directory'] = local
+
+    members = local['members']
+    if role:
+        return [member for member in members if member.role == role]
+    return members
+
+
+def get_staff_ids(role=None):
+    return [member.id for member in get_staff(role)]
+
+
+def invalidate():
+    """Drop the shared list and make every process reload it"""
+    cache.delete(DATA_KEY)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+    _process_cache.pop('directory', None)
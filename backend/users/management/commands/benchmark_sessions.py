@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+ENGINES = [
+    ('db (every request)', 'django.contrib.sessions.backends.db'),
+    ('write-throttled', 'ticketing_system.sessions'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Count django_session writes per N simulated requests for each session engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Simulated seconds between requests (default: 30, the notification poll)')
+        parser.add_argument('--modify-every', type=int, default=0,
+                            help='Change session data on every Nth request (0 = never)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['requests']} requests, {options['interval']}s apart, "
+                          f"SESSION_SAVE_EVERY_REQUEST={settings.SESSION_SAVE_EVERY_REQUEST}")
+        for label, engine in ENGINES:
+            writes, reads = self.run_engine(engine, options)
+            self.stdout.write(f'{label:<20} session writes: {writes:>6}  session reads: {reads:>6}')
+
+    def run_engine(self, engine, options):
+        factory = RequestFactory()
+        clock = FakeClock()
+
+        def view(request):
+            # Like AuthenticationMiddleware, every request reads the session
+            request.session.get('_auth_user_id')
+            if options['modify_every'] and clock.count % options['modify_every'] == 0:
+                request.session['last_page'] = clock.count
+            return HttpResponse()
+
+        with override_settings(SESSION_ENGINE=engine), mock.patch('ticketing_system.sessions.time', clock):
+            middleware = SessionMiddleware(view)
+
+            request = factory.get('/')
+            middleware.process_request(request)
+            request.session['_auth_user_id'] = 'benchmark'
+            request.session.save()
+            session_key = request.session.session_key
+
+            writes = reads = 0
+            for _ in range(options['requests']):
+                clock.tick(options['interval'])
+                request = factory.get('/notifications/unread/')
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+                with CaptureQueriesContext(connection) as queries:
+                    middleware(request)
+                for query in queries.captured_queries:
+                    sql = query['sql'].lstrip().upper()
+                    if 'DJANGO_SESSION' not in sql:
+                        continue
+                    if sql.startswith(('UPDATE', 'INSERT')):
+                        writes += 1
+                    elif sql.startswith('SELECT'):
+                        reads += 1
+
+            request.session.delete()
+        return writes, reads
+
+
+class FakeClock:
+    """Stands in for the time module so simulated requests can be spread out"""
+
+    def __init__(self):
+        import time
+        self.now = time.time()
+        self.count = 0
+
+    def tick(self, seconds):
+        self.now += seconds
+        self.count += 1
+
+    def time(self):
+        return self.now
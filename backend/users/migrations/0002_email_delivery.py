@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="email_delivery",
+            field=models.CharField(
+                choices=[
+                    ("immediate", "Immediately"),
+                    ("hourly", "Hourly digest"),
+                    ("daily", "Daily digest"),
+                ],
+                default="immediate",
+                max_length=10,
+            ),
+        ),
+    ]
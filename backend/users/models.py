@@ -10,11 +10,18 @@ class User(AbstractUser):
         ('automation_team', 'Automation Team Member'),
     ]
 
+    EMAIL_DELIVERY_CHOICES = [
+        ('immediate', 'Immediately'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     phone = models.CharField(max_length=20, blank=True)
     department = models.CharField(max_length=100, blank=True)
+    email_delivery = models.CharField(max_length=10, choices=EMAIL_DELIVERY_CHOICES, default='immediate')
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(null=True, blank=True)
@@ -33,6 +40,12 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.email} ({self.get_role_display()})"
 
+    def get_session_auth_hash(self):
+        # Users rebuilt by users.auth_cache carry the hash instead of the password
+        if 'password' not in self.__dict__ and hasattr(self, '_session_auth_hash'):
+            return self._session_auth_hash
+        return super().get_session_auth_hash()
+
     @property
     def is_admin(self):
         return self.role == 'admin'
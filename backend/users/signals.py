@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .auth_cache import invalidate_user
+from . import directory
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached auth entry on any change, including role and password"""
+    pk = instance.pk
+    invalidate_user(pk)
+    # A request that reads the user before the commit would cache the old row again
+    transaction.on_commit(lambda: invalidate_user(pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_staff_directory(sender, instance, update_fields=None, **kwargs):
+    """Reload the staff directory once the change is visible to other processes"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(directory.invalidate)
+
+
+@receiver(post_init, sender=User)
+def remember_role(sender, instance, **kwargs):
+    instance._loaded_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=User)
+def reanchor_saved_searches(sender, instance, created, **kwargs):
+    """Saved searches are anchored differently for staff and other users"""
+    role, instance._loaded_role = instance._loaded_role, instance.role
+    if created or role is None or role == instance.role:
+        return
+    from tickets.saved_searches import reanchor
+    reanchor(instance)